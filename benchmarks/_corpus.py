@@ -0,0 +1,67 @@
+"""Synthetic CIM documents shared by the benchmarks
+
+Documents mirror the shape of real layer files (layer -> renderer -> symbol 
+reference -> symbol -> symbol layers -> color) and can be nested through group
+layers to any depth.
+"""
+import sys
+from pathlib import Path
+from typing import Any
+
+sys.path.append(str(Path(__file__).parents[1] / 'src'))
+
+from cimple import cim
+
+
+def feature_layer(i: int = 0) -> cim.CIMFeatureLayer:
+    return cim.CIMFeatureLayer(
+        name=f'Layer {i}',
+        uRI=f'CIMPATH=map/layer_{i}.json',
+        renderer=cim.CIMSimpleRenderer(
+            label=f'Renderer {i}',
+            symbol=cim.CIMSymbolReference(
+                symbol=cim.CIMPointSymbol(
+                    symbolLayers=[
+                        cim.CIMVectorMarker(size=8.0 + i % 4),
+                        cim.CIMSolidFill(color=cim.CIMRGBColor(values=[i % 255, 112, 255, 100])),
+                        cim.CIMSolidStroke(color=cim.CIMRGBColor(values=[0, 0, 0, 100])),
+                    ],
+                ),
+            ),
+        ),
+    )
+
+
+def group_layer(depth: int, width: int, _i: int = 0) -> cim.CIMGroupLayer | cim.CIMFeatureLayer:
+    """Nest `width` children per group layer down to `depth` levels"""
+    if depth <= 0:
+        return feature_layer(_i)
+    return cim.CIMGroupLayer(
+        name=f'Group {depth}.{_i}',
+        layers=[group_layer(depth - 1, width, _i * width + n) for n in range(width)],
+    )
+
+
+def layer_document(depth: int = 2, width: int = 3) -> cim.CIMLayerDocument:
+    return cim.CIMLayerDocument(layerDefinitions=[group_layer(depth, width)])
+
+
+def map_document(layers: int = 200) -> cim.CIMMapDocument:
+    return cim.CIMMapDocument(
+        mapDefinition=cim.CIMMap(name='Map', layers=[f'CIMPATH=map/layer_{i}.json' for i in range(layers)]),
+        layerDefinitions=[feature_layer(i) for i in range(layers)],
+    )
+
+
+def count_nodes(obj: Any) -> int:
+    """Count every JSON value (objects, arrays and scalars) in a parsed document"""
+    stack = [obj]
+    nodes = 0
+    while stack:
+        o = stack.pop()
+        nodes += 1
+        if isinstance(o, dict):
+            stack.extend(o.values())
+        elif isinstance(o, list):
+            stack.extend(o)
+    return nodes
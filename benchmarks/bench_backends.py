@@ -0,0 +1,55 @@
+"""JSON backend benchmark
+
+Parses the benchmark corpus with every installed JSON backend and reports the
+parse time and the full `json_to_cimple` time, checking that every backend
+decodes the same objects.
+
+Default documents hold Infinity, so msgspec and orjson hand them to the stdlib
+and take the same time. They only parse sparse documents faster (msgspec about
+1.5x, orjson about 1.4x) and the conversion dominates `json_to_cimple` either
+way, so the stdlib stays the default backend.
+
+    python benchmarks/bench_backends.py
+"""
+import importlib.util
+from timeit import Timer
+
+from _corpus import layer_document, map_document
+from cimple import cimple_to_json, json_to_cimple, set_backend
+from cimple.backends import BACKENDS
+
+
+def per_call(func) -> float:
+    # Best of several runs, the parsers are sensitive to other load on the machine
+    timer = Timer(func)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(7, loops)) / loops * 1e3
+
+
+def main():
+    # Default documents hold Infinity (CIMSymbolReference.maxScale), which only
+    # the stdlib reads, sparse documents leave the default out
+    corpus = {
+        'map (200 layers)': cimple_to_json(map_document(200)),
+        'map sparse': cimple_to_json(map_document(200), profile='sparse'),
+        'layer doc (4x3)': cimple_to_json(layer_document(depth=4, width=3)),
+        'layer doc sparse': cimple_to_json(layer_document(depth=4, width=3), profile='sparse'),
+    }
+    installed = [name for name in BACKENDS if name == 'stdlib' or importlib.util.find_spec(name)]
+    print(f'{"document":<18} {"backend":<8} {"parse ms":>9} {"json_to_cimple ms":>18}')
+    for name, text in corpus.items():
+        expected = None
+        for backend_name in installed:
+            backend = set_backend(backend_name)
+            result = json_to_cimple(text)
+            expected = expected or result
+            assert result == expected
+            print(
+                f'{name:<18} {backend_name:<8} {per_call(lambda: backend.loads(text)):>9.2f} '
+                f'{per_call(lambda: json_to_cimple(text)):>18.2f}'
+            )
+    set_backend()
+
+
+if __name__ == '__main__':
+    main()
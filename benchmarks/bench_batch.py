@@ -0,0 +1,40 @@
+"""Batch conversion benchmark
+
+Converts a batch of small layer documents one call at a time and through a
+single `Batch`, and reports the throughput in documents per second.
+
+    python benchmarks/bench_batch.py
+"""
+from timeit import Timer
+
+from _corpus import layer_document
+from cimple import Batch, cimple_to_json, json_to_cimple
+
+
+def main():
+    documents = [layer_document(depth=0) for _ in range(2000)]
+    texts = [cimple_to_json(doc) for doc in documents]
+    batch = Batch()
+    cases = {
+        'cimple_to_json': (
+            lambda: [cimple_to_json(doc) for doc in documents],
+            lambda: list(batch.cimple_to_json(documents)),
+        ),
+        'json_to_cimple': (
+            lambda: [json_to_cimple(text) for text in texts],
+            lambda: list(batch.json_to_cimple(texts)),
+        ),
+    }
+    print(f'{"converter":<15} {"per call doc/s":>15} {"batch doc/s":>12} {"speedup":>8}')
+    for name, (single, batched) in cases.items():
+        loops, single_time = Timer(single).autorange()
+        single_time /= loops
+        loops, batch_time = Timer(batched).autorange()
+        batch_time /= loops
+        n = len(documents)
+        print(f'{name:<15} {n/single_time:>15,.0f} {n/batch_time:>12,.0f} {single_time/batch_time:>7.2f}x')
+    print(batch.stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Binary format benchmark
+
+Compares the size and encode/decode time of the cimple binary format against
+the JSON converters (default and sparse profile) on the benchmark corpus, and
+the time to read the name of every layer of a map document by decoding it and
+through a view.
+
+    python benchmarks/bench_binary.py
+"""
+from timeit import Timer
+
+from _corpus import layer_document, map_document
+from cimple import bytes_to_cimple, cimple_to_bytes, cimple_to_json, json_to_cimple, open_view
+
+
+def per_call(func) -> float:
+    loops, elapsed = Timer(func).autorange()
+    return elapsed / loops * 1e3
+
+
+def main():
+    corpus = {
+        'map (200 layers)': map_document(200),
+        'layer doc (4x3)': layer_document(depth=4, width=3),
+    }
+    formats = {
+        'json': (lambda doc: cimple_to_json(doc, indent=None), json_to_cimple),
+        'json sparse': (lambda doc: cimple_to_json(doc, profile='sparse'), json_to_cimple),
+        'binary': (cimple_to_bytes, bytes_to_cimple),
+    }
+    print(f'{"document":<18} {"format":<12} {"KB":>7} {"encode ms":>10} {"decode ms":>10}')
+    for name, doc in corpus.items():
+        for fmt, (encode, decode) in formats.items():
+            data = encode(doc)
+            size = len(data) if isinstance(data, bytes) else len(data.encode())
+            print(
+                f'{name:<18} {fmt:<12} {size/1e3:>7.1f} '
+                f'{per_call(lambda: encode(doc)):>10.2f} {per_call(lambda: decode(data)):>10.2f}'
+            )
+
+    
+    print()
+    data = cimple_to_bytes(map_document(200))
+    decoded = per_call(lambda: [layer.name for layer in bytes_to_cimple(data).layerDefinitions])
+    viewed = per_call(lambda: [layer.name for layer in open_view(data).layerDefinitions])
+    print(f'layer names of a 200 layer map: decode {decoded:.2f} ms, view {viewed:.2f} ms ({decoded/viewed:.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
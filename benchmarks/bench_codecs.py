@@ -0,0 +1,43 @@
+"""Generated codec benchmark
+
+Compares `cimple_to_json`/`json_to_cimple`, which use the generated per-class
+codecs, with the generic `cimpleJSONEncoder`/`cimpleJSONDecoder` on large map
+and layer documents.
+
+    python benchmarks/bench_codecs.py
+"""
+import json
+from timeit import Timer
+
+from _corpus import layer_document, map_document
+from cimple import cimple_to_json, json_to_cimple
+from cimple.conversion import cimpleJSONDecoder, cimpleJSONEncoder
+
+
+def timed(func) -> float:
+    loops, total = Timer(func).autorange()
+    return total / loops
+
+
+def main():
+    docs = {
+        'CIMMapDocument (500 layers)': map_document(500),
+        'CIMLayerDocument (depth 6)': layer_document(6, 3),
+    }
+    print(f'{"document":<28} {"indent":>6} {"step":<7} {"generic ms":>11} {"codec ms":>9} {"speedup":>8}')
+    for name, doc in docs.items():
+        for indent in (4, None):
+            doc_json = cimple_to_json(doc, indent=indent)  # type: ignore
+            assert doc_json == json.dumps(doc, indent=indent, cls=cimpleJSONEncoder)
+            
+            generic = timed(lambda: json.dumps(doc, indent=indent, cls=cimpleJSONEncoder))
+            codec = timed(lambda: cimple_to_json(doc, indent=indent))  # type: ignore
+            print(f'{name:<28} {str(indent):>6} {"encode":<7} {generic*1e3:>11.2f} {codec*1e3:>9.2f} {generic/codec:>7.1f}x')
+            
+            generic = timed(lambda: json.loads(doc_json, cls=cimpleJSONDecoder))
+            codec = timed(lambda: json_to_cimple(doc_json))
+            print(f'{name:<28} {str(indent):>6} {"decode":<7} {generic*1e3:>11.2f} {codec*1e3:>9.2f} {generic/codec:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""cimple <--> arcpy.cim conversion benchmark
+
+Times `cim_to_cimple` and `cimple_to_cim` on layer documents of increasing
+size and reports the throughput in objects per second.
+
+    python benchmarks/bench_convert.py
+"""
+from timeit import Timer
+
+from _corpus import layer_document
+from cimple import cim_to_cimple, cimple_to_cim
+from cimple.cim._registry import REGISTRY
+
+
+def count_objects(obj: object) -> int:
+    stack = [obj]
+    objects = 0
+    while stack:
+        o = stack.pop()
+        if isinstance(o, list):
+            stack.extend(o)
+        elif o.__class__.__name__ in REGISTRY:
+            objects += 1
+            stack.extend(o.__dict__.values())
+    return objects
+
+
+def main():
+    print(f'{"depth":>5} {"width":>5} {"objects":>8} {"to cim obj/s":>13} {"to cimple obj/s":>16}')
+    for depth, width in ((2, 3), (4, 3), (6, 3), (8, 3)):
+        cimple_doc = layer_document(depth, width)
+        cim_doc = cimple_to_cim(cimple_doc)
+        objects = count_objects(cimple_doc)
+        loops, to_cim = Timer(lambda: cimple_to_cim(cimple_doc)).autorange()
+        to_cim /= loops
+        loops, to_cimple = Timer(lambda: cim_to_cimple(cim_doc)).autorange()
+        to_cimple /= loops
+        print(f'{depth:>5} {width:>5} {objects:>8} {objects/to_cim:>13,.0f} {objects/to_cimple:>16,.0f}')
+
+
+if __name__ == '__main__':
+    main()
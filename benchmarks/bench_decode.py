@@ -0,0 +1,29 @@
+"""Decoder scaling benchmark
+
+Times `json_to_cimple` on synthetic layer documents of increasing depth and 
+width. A linear decoder keeps the per-node cost flat as documents grow.
+
+    python benchmarks/bench_decode.py
+"""
+import json
+from timeit import Timer
+
+from _corpus import count_nodes, layer_document
+from cimple import cimple_to_json, json_to_cimple
+
+
+def bench(doc_json: str) -> tuple[int, float]:
+    nodes = count_nodes(json.loads(doc_json))
+    loops, total = Timer(lambda: json_to_cimple(doc_json)).autorange()
+    return nodes, total / loops
+
+
+def main():
+    print(f'{"depth":>5} {"width":>5} {"nodes":>9} {"ms":>9} {"us/node":>8}')
+    for depth, width in [(d, 2) for d in range(1, 11)] + [(2, w) for w in (4, 8, 16, 32)]:
+        nodes, seconds = bench(cimple_to_json(layer_document(depth, width), indent=0))
+        print(f'{depth:>5} {width:>5} {nodes:>9} {seconds*1e3:>9.2f} {seconds/nodes*1e6:>8.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Type discriminator benchmark
+
+Decodes the same documents with `cimpleJSONDecoder` when `type` is the last
+key of every object (the decoder has to build a dict before it knows the class)
+and when it is the first key (as the encoders write it), next to the stdlib
+`json_to_cimple`, which parses plain dicts before converting them.
+
+    python benchmarks/bench_discriminator.py
+"""
+import json
+from timeit import Timer
+
+from _corpus import layer_document, map_document
+from cimple import cimple_to_json, json_to_cimple, set_backend
+from cimple.conversion import cimpleJSONDecoder
+
+
+def timed(func) -> float:
+    # Best of several runs, the decoders are sensitive to other load on the machine
+    timer = Timer(func)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(7, loops)) / loops
+
+
+def type_last(pairs: list[tuple[str, object]]) -> dict[str, object]:
+    d = dict(pairs)
+    if 'type' in d:
+        d['type'] = d.pop('type')
+    return d
+
+
+def main():
+    set_backend('stdlib')
+    docs = {
+        'CIMMapDocument (500 layers)': map_document(500),
+        'CIMLayerDocument (depth 6)': layer_document(6, 3),
+    }
+    decoder = cimpleJSONDecoder()
+    print(f'{"document":<28} {"type last ms":>12} {"type first ms":>13} {"json_to_cimple ms":>17}')
+    for name, doc in docs.items():
+        first = cimple_to_json(doc, indent=None)  # type: ignore
+        last = json.dumps(json.loads(first, object_pairs_hook=type_last))
+        assert decoder.decode(first) == decoder.decode(last) == json_to_cimple(first) == doc
+        print(
+            f'{name:<28} {timed(lambda: decoder.decode(last))*1e3:>12.2f} '
+            f'{timed(lambda: decoder.decode(first))*1e3:>13.2f} '
+            f'{timed(lambda: json_to_cimple(first))*1e3:>17.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""Encoder scaling benchmark
+
+Times `cim_to_json` on arcpy.cim layer documents of increasing depth and 
+width. A linear encoder keeps the per-node cost flat as documents grow.
+
+    python benchmarks/bench_encode.py
+"""
+import json
+from timeit import Timer
+
+from _corpus import count_nodes, layer_document
+from cimple import cim_to_json, cimple_to_json, json_to_cim
+
+
+def main():
+    print(f'{"depth":>5} {"width":>5} {"nodes":>9} {"ms":>9} {"us/node":>8}')
+    for depth, width in [(d, 2) for d in range(1, 11)] + [(2, w) for w in (4, 8, 16, 32)]:
+        cim_obj = json_to_cim(cimple_to_json(layer_document(depth, width), indent=0))
+        nodes = count_nodes(json.loads(cim_to_json(cim_obj)))
+        loops, total = Timer(lambda: cim_to_json(cim_obj)).autorange()
+        seconds = total / loops
+        print(f'{depth:>5} {width:>5} {nodes:>9} {seconds*1e3:>9.2f} {seconds/nodes*1e6:>8.3f}')
+
+
+if __name__ == '__main__':
+    main()
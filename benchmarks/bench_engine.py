@@ -0,0 +1,141 @@
+"""Traversal engine benchmark
+
+Runs the converter shells through the explicit stack engine and through a
+recursive driver built from the same shells, next to the recursive conversions
+cimple had before the engine (ported below, without their geometry handling,
+which the corpus doesn't need), and reports nodes per second. The JSON rows
+time the whole conversion to and from a string.
+
+The engine trades some speed for converting documents nested past the
+recursion limit. It is slower than the recursive driver, and for cimple ->
+json it is slower than the encoder writing objects itself, so cimple_to_json
+only uses it for profiles that rewrite values. The finish converts a group
+layer nested far past the recursion limit.
+
+    python benchmarks/bench_engine.py
+"""
+import json
+import sys
+from enum import EnumType
+from timeit import Timer
+from typing import Any
+
+from _corpus import count_nodes, layer_document
+from arcpy import cim as arcpy_cim
+from cimple import cim, cim_to_cimple, cimple_to_cim, cimple_to_json
+from cimple._engine import Shell, traverse
+from cimple.conversion import (
+    _from_json_shell,
+    _to_cim_shell,
+    _to_cimple_shell,
+    _to_json_shell,
+    cimpleJSONEncoder,
+)
+
+
+def recurse(root: Any, shell: Shell) -> Any:
+    """The recursive equivalent of traverse"""
+    def schedule(container: Any, key: Any, kind: str | None = None) -> None:
+        container[key] = shell(container[key], kind, schedule)
+    return shell(root, None, schedule)
+
+
+# The conversions before the engine
+
+def original_hook(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        _type = obj.pop('type', None)
+        if cimple_cls := getattr(cim, str(_type), None):
+            return cimple_cls(**{k: original_hook(v) for k, v in obj.items()})
+    elif isinstance(obj, list):
+        return [original_hook(o) for o in obj]
+    return obj
+
+
+def original_to_cim(obj: Any) -> Any:
+    if isinstance(obj, list):
+        return [original_to_cim(o) for o in obj]
+    cim_cls = getattr(arcpy_cim, obj.__class__.__name__, None)
+    # Enums are in the arcpy.cim namespace too and aren't initialized
+    if cim_cls and not isinstance(cim_cls, EnumType):
+        cim_obj = cim_cls()
+        cim_obj.__dict__.update({k: original_to_cim(v) for k, v in obj.__dict__.items()})
+        return cim_obj
+    return obj
+
+
+def original_to_cimple(obj: Any) -> Any:
+    if isinstance(obj, list):
+        return [original_to_cimple(o) for o in obj]
+    cimple_cls = getattr(cim, obj.__class__.__name__, None)
+    if cimple_cls:
+        return cimple_cls(**{k: original_to_cimple(v) for k, v in obj.__dict__.items()})
+    return obj
+
+
+def rate(func, nodes: int) -> float:
+    # Best of several runs, the converters are sensitive to other load on the machine
+    timer = Timer(func)
+    loops, _ = timer.autorange()
+    return nodes * loops / min(timer.repeat(7, loops))
+
+
+def main():
+    doc = layer_document(6, 3)
+    doc_json = cimple_to_json(doc, indent=None)  # type: ignore
+    cim_doc = cimple_to_cim(doc)
+    nodes = count_nodes(json.loads(doc_json))
+    
+    def encode(value: Any) -> str:
+        return json.dumps(value, cls=cimpleJSONEncoder)
+    
+    # converter: (original, recursive driver, engine)
+    cases = {
+        'cimple -> json': (
+            lambda: encode(doc),
+            lambda: encode(recurse(doc, _to_json_shell)),
+            lambda: encode(traverse(doc, _to_json_shell)),
+        ),
+        # Parsed JSON is converted in place so it has to be parsed each run
+        'json -> cimple': (
+            lambda: json.loads(doc_json, object_hook=original_hook),
+            lambda: recurse(json.loads(doc_json), _from_json_shell),
+            lambda: traverse(json.loads(doc_json), _from_json_shell),
+        ),
+        'cimple -> cim': (
+            lambda: original_to_cim(doc),
+            lambda: recurse(doc, _to_cim_shell),
+            lambda: traverse(doc, _to_cim_shell),
+        ),
+        'cim -> cimple': (
+            lambda: original_to_cimple(cim_doc),
+            lambda: recurse(cim_doc, _to_cimple_shell),
+            lambda: traverse(cim_doc, _to_cimple_shell),
+        ),
+    }
+    print(f'{nodes} nodes per document')
+    print(f'{"converter":<16} {"original nodes/s":>17} {"recursive nodes/s":>18} {"engine nodes/s":>15}')
+    for name, funcs in cases.items():
+        original, recursive, iterative = (rate(func, nodes) for func in funcs)
+        print(f'{name:<16} {original:>17,.0f} {recursive:>18,.0f} {iterative:>15,.0f}')
+    
+    depth = sys.getrecursionlimit() * 5
+    deep = cim.CIMGroupLayer(name='leaf')
+    for _ in range(depth):
+        deep = cim.CIMGroupLayer(layers=[deep])
+    try:
+        recurse(deep, _to_cim_shell)
+        print(f'recursive: converted {depth} nested group layers')
+    except RecursionError:
+        print(f'recursive: RecursionError at {depth} nested group layers')
+    back = cim_to_cimple(cimple_to_cim(deep))
+    levels = 0
+    while back.layers:
+        back = back.layers[0]
+        levels += 1
+    assert levels == depth and back.name == 'leaf'
+    print(f'iterative: converted {depth} nested group layers')
+
+
+if __name__ == '__main__':
+    main()
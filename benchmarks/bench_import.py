@@ -0,0 +1,76 @@
+"""Cold start benchmark
+
+Times `import cimple` in fresh interpreters with the cim package already built,
+and reports if arcpy was imported along the way. `check_cimple` times the
+startup validation of the built package alone. `import arcpy` is timed for
+comparison, it takes seconds with ArcGIS Pro and milliseconds with the test
+stand-in.
+
+    python benchmarks/bench_import.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+PROBE = '''
+import sys
+from time import perf_counter
+start = perf_counter()
+import {module}
+print(perf_counter() - start, 'arcpy' in sys.modules)
+'''
+
+
+# Runs check_cimple on its own, without the package __init__ that calls it
+CHECK = '''
+import sys, types
+from time import perf_counter
+package = types.ModuleType('cimple')
+package.__path__ = [{root!r}]
+sys.modules['cimple'] = package
+from cimple._build import check_cimple
+start = perf_counter()
+check_cimple({init!r})
+print(perf_counter() - start, 'arcpy' in sys.modules)
+'''
+
+
+def probe(module: str) -> str:
+    if module == 'check_cimple':
+        package = ROOT / 'src' / 'cimple'
+        return CHECK.format(root=str(package), init=str(package / '__init__.py'))
+    return PROBE.format(module=module)
+
+
+def cold_start(module: str, runs: int = 15) -> tuple[float, bool]:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [str(ROOT / 'src'), str(ROOT / 'tests' / 'stubs'), env.get('PYTHONPATH', '')]
+    )
+    times: list[float] = []
+    arcpy = False
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-c', probe(module)],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        times.append(float(out[-2]))
+        arcpy = out[-1] == 'True'
+    return statistics.median(times), arcpy
+
+
+def main():
+    # Make sure the cim package is built before timing
+    cold_start('cimple', runs=1)
+    print(f'{"import":<14} {"median ms":>9} {"arcpy imported":>14}')
+    for module in ('arcpy', 'cimple', 'cimple.cim', 'check_cimple'):
+        seconds, arcpy = cold_start(module)
+        print(f'{module:<14} {seconds*1e3:>9.1f} {str(arcpy):>14}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Parallel decoding benchmark
+
+Decodes a corpus of layer documents with `json_to_cimple` on one core and with
+`map_documents` on an increasing number of workers, returning only a small
+result from each worker.
+
+    python benchmarks/bench_parallel.py
+"""
+import os
+from time import perf_counter
+
+from _corpus import layer_document
+from cimple import cimple_to_json, json_to_cimple, map_documents
+
+
+def layer_count(doc) -> int:
+    return len(doc.layerDefinitions[0].layers)
+
+
+def main():
+    texts = [cimple_to_json(layer_document(depth=2, width=3)) for _ in range(2000)]
+    start = perf_counter()
+    for text in texts:
+        layer_count(json_to_cimple(text))
+    serial = perf_counter() - start
+    print(f'{"workers":>7} {"doc/s":>8} {"speedup":>8}')
+    print(f'{"serial":>7} {len(texts)/serial:>8,.0f} {1:>7.2f}x')
+    workers = 1
+    while workers <= (os.process_cpu_count() or 1):
+        start = perf_counter()
+        for _ in map_documents(texts, layer_count, workers=workers):
+            pass
+        elapsed = perf_counter() - start
+        print(f'{workers:>7} {len(texts)/elapsed:>8,.0f} {serial/elapsed:>7.2f}x')
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Pickle benchmark
+
+Compares pickle size, dump time and load time of the generated pickle support
+(class name plus field values) against the default dataclass pickling (class
+plus the instance __dict__) for map documents.
+
+Pickles are about 37% smaller, dumps and loads are 1.2-1.5x slower because
+a Python level reduce and restore replace the C __dict__ path. Leaving
+trailing defaults out made pickles another 23% smaller but dumps and loads
+1.8x slower than the __dict__ path, which doesn't pay off over a local pipe.
+
+    python benchmarks/bench_pickle.py
+"""
+import copyreg
+import io
+import pickle
+from timeit import Timer
+
+from _corpus import map_document
+from cimple.cim._base import CIMBase
+
+
+class DictPickler(pickle.Pickler):
+    """Pickles cimple objects the way dataclasses are pickled by default"""
+    def reducer_override(self, obj):
+        if isinstance(obj, CIMBase) and not isinstance(obj, type):
+            return copyreg.__newobj__, (type(obj),), obj.__dict__
+        return NotImplemented
+
+
+def dict_dumps(obj) -> bytes:
+    buffer = io.BytesIO()
+    DictPickler(buffer, pickle.HIGHEST_PROTOCOL).dump(obj)
+    return buffer.getvalue()
+
+
+def per_call(func) -> float:
+    # Best of several runs, pickling is sensitive to other load on the machine
+    timer = Timer(func)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(7, loops)) / loops * 1e3
+
+
+def main():
+    print(f'{"layers":>6} {"pickling":<10} {"KB":>7} {"dump ms":>8} {"load ms":>8}')
+    for layers in (20, 200):
+        doc = map_document(layers)
+        for name, dumps in (('__dict__', dict_dumps), ('generated', lambda o: pickle.dumps(o, pickle.HIGHEST_PROTOCOL))):
+            data = dumps(doc)
+            assert pickle.loads(data) == doc
+            print(
+                f'{layers:>6} {name:<10} {len(data)/1e3:>7.1f} '
+                f'{per_call(lambda: dumps(doc)):>8.2f} {per_call(lambda: pickle.loads(data)):>8.2f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Encoding profile size benchmark
+
+Encodes the benchmark corpus with the default output, the default without
+indentation and the compact and sparse profiles, and reports the raw and 
+gzipped sizes and the encode time.
+
+    python benchmarks/bench_profile.py
+"""
+import gzip
+from timeit import Timer
+
+from _corpus import layer_document, map_document
+from cimple import cimple_to_json
+
+
+def main():
+    corpus = {
+        'map (200 layers)': map_document(200),
+        'layer doc (4x3)': layer_document(depth=4, width=3),
+    }
+    encodings = {
+        'indent=4': lambda doc: cimple_to_json(doc),
+        'indent=None': lambda doc: cimple_to_json(doc, indent=None),
+        'compact': lambda doc: cimple_to_json(doc, profile='compact'),
+        'sparse': lambda doc: cimple_to_json(doc, profile='sparse'),
+    }
+    print(f'{"document":<18} {"encoding":<12} {"KB":>8} {"gzip KB":>8} {"size":>6} {"ms":>7}')
+    for name, doc in corpus.items():
+        baseline = None
+        for encoding, encode in encodings.items():
+            text = encode(doc).encode()
+            baseline = baseline or len(text)
+            loops, elapsed = Timer(lambda: encode(doc)).autorange()
+            print(
+                f'{name:<18} {encoding:<12} {len(text)/1e3:>8.1f} {len(gzip.compress(text))/1e3:>8.1f} '
+                f'{len(text)/baseline:>6.0%} {elapsed/loops*1e3:>7.2f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Streaming benchmark
+
+Writes a map document with many layers to a temporary file and compares the
+time and peak traced memory of `json_to_cimple` on the whole file against
+`iter_cimple` over its layerDefinitions, and of writing `cimple_to_json` 
+against `dump_cimple`.
+
+    python benchmarks/bench_stream.py
+"""
+import tempfile
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+
+from _corpus import map_document
+from cimple import cimple_to_json, dump_cimple, iter_cimple, json_to_cimple
+
+
+def measure(func) -> tuple[float, int]:
+    tracemalloc.start()
+    start = perf_counter()
+    func()
+    elapsed = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def whole(path: Path) -> None:
+    for _ in json_to_cimple(path.read_text(encoding='utf-8')).layerDefinitions:
+        pass
+
+
+def streamed(path: Path) -> None:
+    with path.open(encoding='utf-8') as fp:
+        for _ in iter_cimple(fp):
+            pass
+
+
+def write_whole(doc, path: Path) -> None:
+    path.write_text(cimple_to_json(doc), encoding='utf-8')
+
+
+def write_streamed(doc, path: Path) -> None:
+    with path.open('w', encoding='utf-8') as fp:
+        dump_cimple(doc, fp)
+
+
+def main():
+    print(f'{"layers":>7} {"MB":>6} {"whole s":>8} {"whole peak MB":>14} {"stream s":>9} {"stream peak MB":>15}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for layers in (100, 1000, 5000):
+            path = Path(tmp) / f'map_{layers}.mapx'
+            path.write_text(cimple_to_json(map_document(layers)), encoding='utf-8')
+            size = path.stat().st_size / 1e6
+            whole_time, whole_peak = measure(lambda: whole(path))
+            stream_time, stream_peak = measure(lambda: streamed(path))
+            print(
+                f'{layers:>7} {size:>6.1f} {whole_time:>8.2f} {whole_peak/1e6:>14.1f} '
+                f'{stream_time:>9.2f} {stream_peak/1e6:>15.1f}'
+            )
+        
+        print()
+        print(f'{"layers":>7} {"write s":>8} {"write peak MB":>14} {"dump s":>7} {"dump peak MB":>13}')
+        for layers in (100, 1000, 5000):
+            doc = map_document(layers)
+            path = Path(tmp) / 'out.mapx'
+            whole_time, whole_peak = measure(lambda: write_whole(doc, path))
+            stream_time, stream_peak = measure(lambda: write_streamed(doc, path))
+            print(
+                f'{layers:>7} {whole_time:>8.2f} {whole_peak/1e6:>14.1f} '
+                f'{stream_time:>7.2f} {stream_peak/1e6:>13.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,21 @@
 
-from ._build import check_cimple, __version__, __arcpy_version__
+from typing import Any
+
+from ._build import check_cimple, __version__
 check_cimple(__file__)
 
+def __getattr__(name: str) -> Any:
+    # Reading the arcpy version imports arcpy (see cimple._build)
+    if name == '__arcpy_version__':
+        from ._build import get_arcpy_version
+        return get_arcpy_version()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
 from .cim import *
 
-# Because the json conversions for cimple and cim are identical
-# cim_to_json and json_to_cim are implemented using cimple objects
-# as an intermediary
+# cim_to_json and json_to_cim convert arcpy.cim objects directly, only
+# cim_to_json with a profile goes through cimple objects (the profiles
+# rewrite the JSON ready documents the cimple codecs build)
 
 from .conversion import (
     cimpleJSONDecoder as cimpleJSONDecoder, 
@@ -21,12 +30,44 @@ from .conversion import (
     # cimple cim converters
     cim_to_cimple as cim_to_cimple,
     cimple_to_cim as cimple_to_cim,
+    ConversionMemo as ConversionMemo,
     
     # cim json converters
     cim_to_json as cim_to_json,
     json_to_cim as json_to_cim,
 )
 
+from .batch import (
+    Batch as Batch,
+    BatchStats as BatchStats,
+)
+from .parallel import map_documents as map_documents
+from .backends import (
+    set_backend as set_backend,
+    get_backend as get_backend,
+)
+from .geometry import (
+    JSONGeometry as JSONGeometry,
+    JSONSpatialReference as JSONSpatialReference,
+    set_geometry_mode as set_geometry_mode,
+    get_geometry_mode as get_geometry_mode,
+)
+from .binary import (
+    cimple_to_bytes as cimple_to_bytes,
+    bytes_to_cimple as bytes_to_cimple,
+    open_view as open_view,
+)
+from .profiles import (
+    EncodingProfile as EncodingProfile,
+    PROFILES as PROFILES,
+)
+from .stream import (
+    iter_cimple as iter_cimple,
+    iter_cim as iter_cim,
+    dump_cimple as dump_cimple,
+    dump_cim as dump_cim,
+)
+
 if __name__ == '__main__':
     # rebuild the cim when run
     from ._build import build_cim
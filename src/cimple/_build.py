@@ -1,24 +1,45 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import warnings
 from collections import defaultdict
+from contextlib import contextmanager
 from enum import Enum, EnumType
+from functools import cache
+from importlib.util import cache_from_source, find_spec
 from pathlib import Path
 from types import ModuleType
-from typing import Any
+from typing import Any, Iterator
+from uuid import uuid4
 
-from arcpy import (
-    cim as _cim, 
-    version as _version,
-)
+from ._info import DECODED_KINDS
 
 __version__ = (0,1,0)
 MOD_ROOT = Path(__file__).parent
 
-# Get version info from arcpy as tuple of ints (<major>, <minor>, <build>)
-# Fallback to (0,0,0) if format is broken and __version__ info can't be determined
-try:
-    __arcpy_version__ = tuple(map(int,(*_version.data['version'].split('.')[:2], _version.build))) # type: ignore
-except Exception:
-    print('failed to determine arcpy version')
-    __arcpy_version__ = (0,0,0)
+# Written by build_cim, checked by check_cimple without importing arcpy
+STAMP = MOD_ROOT / 'cim' / '_stamp.json'
+
+@cache
+def get_arcpy_version() -> tuple[int, ...]:
+    """Get version info from arcpy as tuple of ints (<major>, <minor>, <build>)
+    
+    Fallback to (0,0,0) if format is broken and __version__ info can't be determined
+    """
+    from arcpy import version as _version
+    try:
+        return tuple(map(int,(*_version.data['version'].split('.')[:2], _version.build))) # type: ignore
+    except Exception:
+        print('failed to determine arcpy version')
+        return (0,0,0)
+
+def __getattr__(name: str) -> Any:
+    # Importing arcpy takes seconds, so its version is only read when requested
+    if name == '__arcpy_version__':
+        return get_arcpy_version()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 # <Enum>: (str_name: val)
 ParsedEnum = dict[Enum, tuple[str, Any]]
@@ -26,7 +47,9 @@ ParsedEnum = dict[Enum, tuple[str, Any]]
 four_spaces = '    '
 
 
-def load(mod: ModuleType = _cim) -> tuple[list[EnumType], list[type]]:
+def load(mod: ModuleType | None = None) -> tuple[list[EnumType], list[type]]:
+    if mod is None:
+        from arcpy import cim as mod
     modules: list[ModuleType] = [mod]
     enums: list[EnumType] = []
     classes: list[type] = []
@@ -97,8 +120,8 @@ def build_literals(enums: dict[EnumType, ParsedEnum]) -> list[str]:
     return literal_strings
 
 
-def write_literals(unique_enums: dict[EnumType, ParsedEnum]) -> None:
-    (MOD_ROOT / 'cim/literals.py').write_text(
+def write_literals(unique_enums: dict[EnumType, ParsedEnum], files: dict[str, str]) -> None:
+    files['literals.py'] = (
         ''.join(
             [
                 'from typing import Literal\n',
@@ -212,12 +235,20 @@ def build_class_attrs(attrs: dict[str, Any], mods: dict[str, type], c: type) ->
 
 def parse_imps(imps: dict[str, set[str]]) -> list[str]:
     has_cim = bool(imps.pop('._CIMCommon', False))
+    # arcpy types are only used in (postponed) annotations, so they are imported
+    # for type checkers and the cim package can be imported without arcpy
+    arcpy_imps = imps.pop('arcpy', set())
+    if arcpy_imps:
+        imps = {'typing': imps.pop('typing', set()) | {'TYPE_CHECKING'}, **imps}
     return [
         f'from .{mod} import (\n{four_spaces}{f",\n{four_spaces}".join(sorted(classes))},\n)\n\n'
         if mod.startswith('CIM') or mod == 'literals' else
         f'from {mod} import (\n{four_spaces}{f",\n{four_spaces}".join(sorted(classes))},\n)\n\n'
         for mod, classes in imps.items()
-    ] + (['from . import _CIMCommon as cc\n\n'] if has_cim else [])
+    ] + (['from . import _CIMCommon as cc\n\n'] if has_cim else []) + (
+        [f'if TYPE_CHECKING:\n{four_spaces}from arcpy import (\n{four_spaces*2}{f",\n{four_spaces*2}".join(sorted(arcpy_imps))},\n{four_spaces})\n\n']
+        if arcpy_imps else []
+    )
 
 
 def get_doc_link(c: type) -> str:
@@ -297,18 +328,472 @@ def build_base_class() -> str:
         if isinstance(value, Enum):
             value = value.name
         return super().__setattr__(name, value)
+    
+    def __reduce_ex__(self, protocol: int) -> tuple[Any, ...]:
+        # Registered classes pickle as their name and field values (see CIMClassInfo.reduce)
+        info = _INFOS.get(self.__class__.__name__)
+        if info is not None and info.cls is self.__class__:
+            return info.reduce(self, protocol)
+        return object.__reduce_ex__(self, protocol)
     """
+def field_kind(val: Any, mods: dict[str, type]) -> str:
+    """Classify a default value the same way build_class_attrs types it"""
+    _attr_type = type(val).__name__
+    if isinstance(val, str) and val in mods:
+        return 'cim'
+    elif isinstance(val, Enum):
+        return 'literal'
+    elif isinstance(val, list):
+        return 'list'
+    elif isinstance(val, dict):
+        return 'dict'
+    elif isinstance(val, str):
+        return 'str'
+    elif val is None:
+        return 'any'
+    elif _attr_type == 'datetime':
+        return 'datetime'
+    elif isinstance(val, bool):
+        return 'bool'
+    elif isinstance(val, int):
+        return 'int'
+    elif repr(val) == 'nan':
+        return 'nan'
+    elif repr(val) == 'inf':
+        return 'inf'
+    elif isinstance(val, float):
+        return 'float'
+    elif repr(val).endswith(".SpatialReference'>"):
+        return 'spatial_reference'
+    elif repr(val).endswith(("Polygon'>", "Extent'>", "Polyline'>", "Geometry'>", "Multipoint'>", "Point'>")):
+        return 'geometry'
+    elif 'CIMExternal' in repr(val):
+        return 'external'
+    return 'any'
+
+# Kinds that can hold nested CIM objects
+CHILD_KINDS = {'cim', 'list', 'dict', 'external', 'any'}
+
+def default_source(val: Any, kind: str) -> str | None:
+    """Get the source of a plain field default, None for default_factory fields"""
+    match kind:
+        case 'cim' | 'list' | 'dict' | 'datetime' | 'external':
+            return None
+        case 'literal':
+            return repr(val.name)
+        case 'str' | 'bool' | 'int' | 'float':
+            return repr(val)
+        case 'inf':
+            return 'inf'
+        case _:
+            return 'None'
+
+def factory_source(val: Any, kind: str) -> str:
+    """Get the source of a default_factory call"""
+    match kind:
+        case 'cim':
+            return f'cc.{val}()'
+        case 'list':
+            return '[]'
+        case 'dict':
+            return '{}'
+        case 'datetime':
+            return 'datetime.now()'
+        case _:
+            # CIMExternal
+            return f"cc.{repr(val).split('.')[-1][:-2]}()"
+
+# Kinds that are passed through the encode callback by the codecs
+# (geometries and spatial references are written as their esri JSON, see cimple.geometry)
+ENCODED_KINDS = CHILD_KINDS | {'datetime', 'geometry', 'spatial_reference'}
+
+def build_codecs(c: type, attrs: dict[str, Any], mods: dict[str, type]) -> str:
+    name = c.__name__
+    to_dict: list[str] = []
+    to_sparse_dict: list[str] = []
+    from_dict: list[str] = []
+    from_dict_children: list[str] = []
+    for f, val in attrs.items():
+        kind = field_kind(val, mods)
+        default = default_source(val, kind)
+        
+        # Copying __dict__ is faster than reading each attribute, so only
+        # the fields that can hold objects are replaced in the copy
+        if kind in ENCODED_KINDS:
+            to_dict.append(f"{four_spaces}enc(d, '{f}')")
+        
+        # Sparse dicts drop fields still at their default, from_dict fills them back in.
+        # Values that only equal the default (0 for 0.0, None for []) are kept
+        if default is not None:
+            test = (
+                f"d['{f}'] is {default}" if default in ('None', 'True', 'False')
+                else f"d['{f}'] == {default} and d['{f}'].__class__ is {type(val if kind != 'literal' else val.name).__name__}"
+            )
+        elif kind in ('list', 'dict'):
+            test = f"not d['{f}'] and d['{f}'].__class__ is {kind}"
+        else:
+            test = None
+        if test is None:
+            to_sparse_dict.append(f"{four_spaces}enc(d, '{f}')")
+        elif kind in ENCODED_KINDS:
+            to_sparse_dict.extend(
+                [
+                    f'{four_spaces}if {test}:',
+                    f"{four_spaces*2}del d['{f}']",
+                    f'{four_spaces}else:',
+                    f"{four_spaces*2}enc(d, '{f}')",
+                ]
+            )
+        else:
+            to_sparse_dict.extend(
+                [
+                    f'{four_spaces}if {test}:',
+                    f"{four_spaces*2}del d['{f}']",
+                ]
+            )
+        
+        if kind in DECODED_KINDS:
+            from_dict_children.append(f"{four_spaces}dec(s, '{f}', '{kind}')")
+        elif kind == 'float':
+            # Profiles that normalize nan and inf write inf as a string
+            from_dict_children.extend(
+                [
+                    f"{four_spaces}if s['{f}'].__class__ is str:",
+                    f"{four_spaces*2}dec(s, '{f}', 'float')",
+                ]
+            )
+        elif kind in CHILD_KINDS:
+            from_dict_children.append(f"{four_spaces}dec(s, '{f}')")
+        
+        if default is not None:
+            from_dict.append(f"{four_spaces*2}'{f}': d.get('{f}', {default}),")
+        else:
+            from_dict.append(f"{four_spaces*2}'{f}': d['{f}'] if '{f}' in d else {factory_source(val, kind)},")
+    
+    # Keys that aren't fields (unknown JSON keys, attributes set on an object)
+    # are kept after the fields and converted like untyped fields
+    encode_extra = [
+        f'{four_spaces}if len(d) > {len(attrs) + 1}:',
+        f'{four_spaces*2}for k in _extra(d, cc.{name}):',
+        f'{four_spaces*3}enc(d, k)',
+    ]
+    
+    # The type discriminator is the first key, so decoders know the class
+    # before reading any of its fields (see conversion.cimpleJSONDecoder)
+    return '\n'.join(
+        [
+            f'def {name}_to_dict(o: cc.{name}, enc: Schedule) -> dict[str, Any]:',
+            f"{four_spaces}d = {{'type': '{name}', **o.__dict__}}",
+            *to_dict,
+            *encode_extra,
+            f'{four_spaces}return d',
+            '',
+            f'def {name}_to_sparse_dict(o: cc.{name}, enc: Schedule) -> dict[str, Any]:',
+            f"{four_spaces}d = {{'type': '{name}', **o.__dict__}}",
+            *encode_extra,
+            *to_sparse_dict,
+            f'{four_spaces}return d',
+            '',
+            f'def {name}_from_dict(d: dict[str, Any], dec: Schedule) -> cc.{name}:',
+            f'{four_spaces}s = {{',
+            *from_dict,
+            f'{four_spaces}}}',
+            *from_dict_children,
+            f'{four_spaces}if not s.keys() >= d.keys():',
+            f'{four_spaces*2}for k in _extra(d, cc.{name}):',
+            f'{four_spaces*3}s[k] = d[k]',
+            f'{four_spaces*3}dec(s, k)',
+            f'{four_spaces}o = _new(cc.{name})',
+            f"{four_spaces}_setattr(o, '__dict__', s)",
+            f'{four_spaces}return o',
+            '\n',
+        ]
+    )
+
+def write_codecs(unique_classes: dict[type, dict[str, Any]], class_names: dict[str, type], mod_names: set[str], files: dict[str, str]) -> None:
+    codecs = [
+        build_codecs(c, attrs, class_names)
+        for c, attrs in sorted(unique_classes.items(), key=lambda i: i[0].__name__)
+        if modname(c) in mod_names
+    ]
+    files['_codecs.py'] = (
+        ''.join(
+            [
+                'from __future__ import annotations\n\n',
+                'from datetime import datetime\n',
+                'from math import inf\n',
+                'from typing import Any, Callable\n\n',
+                'from .._info import _extra\n',
+                'from . import _CIMCommon as cc\n\n',
+                '# Schedule container[key] to be converted in place, optionally with its field kind\n',
+                'Schedule = Callable[..., None]\n\n',
+                '# Objects are created without __init__ and their __dict__ set directly\n',
+                '_new = object.__new__\n',
+                '_setattr = object.__setattr__\n\n',
+                *codecs,
+            ]
+        )
+    )
+
+def build_converters(c: type, attrs: dict[str, Any], mods: dict[str, type]) -> str:
+    name = c.__name__
+    children: list[str] = []
+    literals: list[str] = []
+    shapes: list[str] = []
+    for f, val in attrs.items():
+        kind = field_kind(val, mods)
+        # Only fields that can hold CIM objects or lists need converting,
+        # everything else is shared between arcpy.cim and cimple
+        if kind in CHILD_KINDS:
+            children.append(f"{four_spaces}conv(d, '{f}')")
+        # arcpy.cim stores Enums, cimple stores their names
+        elif kind == 'literal':
+            literals.append(f"{four_spaces}d['{f}'] = _name(d['{f}'])")
+        # cimple can hold JSON backed geometries (see cimple.geometry), arcpy.cim can't
+        elif kind in ('geometry', 'spatial_reference'):
+            shapes.append(f"{four_spaces}conv(d, '{f}')")
+    
+    return '\n'.join(
+        [
+            f'def {name}_to_cim(o: cc.{name}, conv: Schedule, cls: type) -> Any:',
+            # arcpy.cim objects need to be initialized before they can be updated
+            f'{four_spaces}cim_obj = cls()',
+            f'{four_spaces}d = cim_obj.__dict__',
+            f'{four_spaces}d.update(o.__dict__)',
+            *children,
+            *shapes,
+            # Attributes that aren't fields are converted like untyped fields
+            f'{four_spaces}if len(o.__dict__) > {len(attrs)}:',
+            f'{four_spaces*2}for k in _extra(o.__dict__, cc.{name}):',
+            f'{four_spaces*3}conv(d, k)',
+            f'{four_spaces}return cim_obj',
+            '',
+            f'def {name}_to_cimple(o: Any, conv: Schedule) -> cc.{name}:',
+            f'{four_spaces}d = o.__dict__.copy()',
+            *literals,
+            *children,
+            f'{four_spaces}if len(d) > {len(attrs)}:',
+            f'{four_spaces*2}for k in _extra(d, cc.{name}):',
+            f'{four_spaces*3}conv(d, k)',
+            f'{four_spaces}cimple_obj = _new(cc.{name})',
+            f"{four_spaces}_setattr(cimple_obj, '__dict__', d)",
+            f'{four_spaces}return cimple_obj',
+            '\n',
+        ]
+    )
+
+def write_converters(unique_classes: dict[type, dict[str, Any]], class_names: dict[str, type], mod_names: set[str], files: dict[str, str]) -> None:
+    converters = [
+        build_converters(c, attrs, class_names)
+        for c, attrs in sorted(unique_classes.items(), key=lambda i: i[0].__name__)
+        if modname(c) in mod_names
+    ]
+    files['_converters.py'] = (
+        ''.join(
+            [
+                'from __future__ import annotations\n\n',
+                'from enum import Enum\n',
+                'from typing import Any, Callable\n\n',
+                'from .._info import _extra\n',
+                'from . import _CIMCommon as cc\n\n',
+                '# Schedule container[key] to be converted in place\n',
+                'Schedule = Callable[..., None]\n\n',
+                '# Objects are created without __init__ and their __dict__ set directly\n',
+                '_new = object.__new__\n',
+                '_setattr = object.__setattr__\n\n',
+                'def _name(value: Any) -> Any:\n',
+                f'{four_spaces}return value.name if isinstance(value, Enum) else value\n\n',
+                *converters,
+            ]
+        )
+    )
+
+def build_registry_entry(c: type, attrs: dict[str, Any], mods: dict[str, type]) -> str:
+    kinds = {name: field_kind(val, mods) for name, val in attrs.items()}
+    defaults = {name: src for name, val in attrs.items() if (src := default_source(val, kinds[name])) is not None}
+    children = tuple(name for name, kind in kinds.items() if kind in CHILD_KINDS)
+    defaults_str = ', '.join(f'{name!r}: {src}' for name, src in defaults.items())
+    return '\n'.join(
+        [
+            f"{four_spaces}'{c.__name__}': CIMClassInfo(",
+            f'{four_spaces*2}cc.{c.__name__},',
+            f"{four_spaces*2}'{c.__module__}',",
+            f'{four_spaces*2}fields={tuple(attrs)},',
+            f'{four_spaces*2}defaults={{{defaults_str}}},',
+            f'{four_spaces*2}children={children},',
+            f'{four_spaces*2}kinds={kinds},',
+            f'{four_spaces*2}to_dict=_codecs.{c.__name__}_to_dict,',
+            f'{four_spaces*2}to_sparse_dict=_codecs.{c.__name__}_to_sparse_dict,',
+            f'{four_spaces*2}from_dict=_codecs.{c.__name__}_from_dict,',
+            f'{four_spaces*2}to_cim=_converters.{c.__name__}_to_cim,',
+            f'{four_spaces*2}to_cimple=_converters.{c.__name__}_to_cimple,',
+            f'{four_spaces}),\n',
+        ]
+    )
+
+def write_registry(unique_classes: dict[type, dict[str, Any]], class_names: dict[str, type], mod_names: set[str], files: dict[str, str]) -> None:
+    entries = [
+        build_registry_entry(c, attrs, class_names)
+        for c, attrs in sorted(unique_classes.items(), key=lambda i: i[0].__name__)
+        if modname(c) in mod_names
+    ]
+    files['_registry.py'] = (
+        ''.join(
+            [
+                'from math import inf\n\n',
+                'from .._info import CIMClassInfo\n',
+                'from . import _CIMCommon as cc\n',
+                'from . import _codecs\n',
+                'from . import _converters\n\n',
+                '# Type name to class metadata for every cimple class\n',
+                'REGISTRY: dict[str, CIMClassInfo] = {\n',
+                *entries,
+                '}\n',
+            ]
+        )
+    )
+
+@contextmanager
+def build_lock() -> Iterator[None]:
+    """Hold the inter-process lock for building cimple.cim, waiting for other builds to finish"""
+    with open(MOD_ROOT / '.cim.lock', 'a+b') as lock:
+        if os.name == 'nt':
+            import msvcrt
+            # LK_LOCK gives up after 10 seconds, builds can take longer
+            while True:
+                try:
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            try:
+                yield
+            finally:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
 def build_cim():
+    """Generate cimple.cim from arcpy.cim
+    
+    One process builds at a time. The package is generated into a new build
+    directory that is published as cim when it is complete (see `publish`), so
+    other processes never import a partially written build.
+    """
+    with build_lock():
+        _build_cim()
+
+def _build_cim():
+    files = generate_cim()
+    modules = {name: source_hash(source) for name, source in files.items()}
+    target = MOD_ROOT / 'cim'
+    stamp = read_stamp()
+    built: dict[str, str] = stamp.get('modules', {}) if stamp is not None else {}
+    # Modules with the same source as the current build keep their files (and bytecode)
+    unchanged = {
+        name for name, digest in modules.items()
+        if built.get(name) == digest and (target / name).exists()
+    }
+    if unchanged == set(files) == set(built):
+        print('cimple.cim is unchanged')
+        write_stamp(target, modules)
+        return
+    
+    # Only the lock holder builds, so anything left by interrupted builds
+    # can go, except the build cim links to
+    current = os.readlink(target) if target.is_symlink() else None
+    for leftover in MOD_ROOT.glob('.cim-*'):
+        if leftover.name != current:
+            remove_build(leftover)
+    # Created with mkdir (not mkdtemp) so the published package gets the usual permissions
+    out = MOD_ROOT / f'.cim-{uuid4().hex}'
+    out.mkdir()
+    try:
+        for name, source in files.items():
+            if name in unchanged:
+                keep_module(target / name, out)
+            else:
+                print(f'writing {name}')
+                (out / name).write_text(source, encoding='utf-8')
+        write_stamp(out, modules)
+        publish(out)
+    except BaseException:
+        remove_build(out)
+        raise
+
+def keep_module(path: Path, out: Path) -> None:
+    """Copy a module and its bytecode to out, keeping the modification time the bytecode was checked against"""
+    shutil.copy2(path, out / path.name)
+    cache = Path(cache_from_source(str(path)))
+    # Bytecode under sys.pycache_prefix is found by the source path, which doesn't change
+    if cache.parent.parent != path.parent:
+        return
+    (out / cache.parent.name).mkdir(exist_ok=True)
+    for pyc in cache.parent.glob(f'{path.stem}.*.pyc'):
+        shutil.copy2(pyc, out / cache.parent.name / pyc.name)
+
+def publish(out: Path) -> None:
+    """Make the generated package in out the cim package
+    
+    cim is a symlink to the current build directory, and a new build is
+    published by replacing the link in one step, so cim always holds a
+    complete build. Where symlinks can't be created (Windows without the
+    privilege to create them) cim is the build directory itself, which can't be
+    replaced while it has files. The old build is moved aside before the new
+    one is moved in, so for that moment there is no cim package.
+    """
+    target = MOD_ROOT / 'cim'
+    link = MOD_ROOT / f'.cim-{uuid4().hex}'
+    try:
+        os.symlink(out.name, link, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        if target.exists():
+            old = MOD_ROOT / f'.cim-{uuid4().hex}'
+            os.replace(target, old)
+            os.replace(out, target)
+            remove_build(old)
+        else:
+            os.replace(out, target)
+        return
+    old = MOD_ROOT / os.readlink(target) if target.is_symlink() else None
+    if old is None and target.exists():
+        # A cim directory built before builds were linked is moved aside once
+        old = MOD_ROOT / f'.cim-{uuid4().hex}'
+        os.replace(target, old)
+    os.replace(link, target)
+    if old is not None:
+        remove_build(old)
+
+def remove_build(path: Path) -> None:
+    """Remove a build directory or a leftover link to one"""
+    if path.is_symlink() or path.is_file():
+        path.unlink(missing_ok=True)
+    else:
+        shutil.rmtree(path, ignore_errors=True)
+
+def generate_cim() -> dict[str, str]:
+    """Generate the source of every module of the cimple.cim package by file name
+    
+    Classes, enums and modules are sorted by name, so the same arcpy always
+    generates the same sources
+    """
+    files: dict[str, str] = {}
     enums, classes = load()
-    (MOD_ROOT / 'cim').mkdir(parents=True, exist_ok=True)
     unique_enums: dict[EnumType, ParsedEnum] = {}
-    for enum in enums:
+    for enum in sorted(enums, key=lambda e: e.__name__):
         unique_enums[enum] = parse_enum(enum)
-    write_literals(unique_enums)
+    write_literals(unique_enums, files)
 
-    unique_classes = dict(parse_cim(c) for c in classes)
+    unique_classes = dict(parse_cim(c) for c in sorted(classes, key=lambda c: (modname(c), c.__name__)))
     class_modules: dict[str, str] = {c.__name__: modname(c) for c in unique_classes}
-    mod_names = set(class_modules.values())
+    mod_names = sorted(set(class_modules.values()))
     class_names = {c.__name__: c for c in unique_classes}
 
     mod_files: dict[str, tuple[dict[str, set[str]], list[str], list[str]]] = {}
@@ -338,8 +823,7 @@ def build_cim():
 
     # Write Submodules
     for m_name, (imports, d_classes, all_) in mod_files.items():
-        print(f'writing {m_name}')
-        (MOD_ROOT / f'cim/{m_name}.py').write_text(
+        files[f'{m_name}.py'] = (
             ''.join(
                 [
                     *base_imports(),
@@ -350,10 +834,13 @@ def build_cim():
             )
         )
     
-    (MOD_ROOT / 'cim/_base.py').write_text(
+    files['_base.py'] = (
         ''.join(
             [
                 'from enum import Enum',
+                '\nfrom typing import Any',
+                '\n\n',
+                'from .._info import _INFOS',
                 '\n\n',
                 build_meta_class(),
                 '\n\n',
@@ -363,7 +850,7 @@ def build_cim():
     )
     
     # Write _CIMCommon
-    (MOD_ROOT / 'cim/_CIMCommon.py').write_text(
+    files['_CIMCommon.py'] = (
         ''.join(
             [
                 *[f'from .{m} import *\n' for m in sorted(mod_files)],
@@ -371,45 +858,125 @@ def build_cim():
         )
     )
     
+    write_codecs(unique_classes, class_names, set(mod_files), files)
+    write_converters(unique_classes, class_names, set(mod_files), files)
+    write_registry(unique_classes, class_names, set(mod_files), files)
+    
     # Write cim.__init__
-    (MOD_ROOT / 'cim/__init__.py').write_text(
+    files['__init__.py'] = (
         ''.join(
             [
+                # Load _CIMCommon first so it is complete before any submodule
+                # that references it finishes importing
+                'from . import _CIMCommon as _CIMCommon\n',
                 # Import __all__
                 *[f'from .{m} import *\n' for m in sorted(mod_files)],
                 
                 # Version Info
                 f'\n# CIM Build',
-                f'\n__cim_version__ = {__arcpy_version__}',
+                f'\n__cim_version__ = {get_arcpy_version()}',
                 f'\n# cimple Version',
                 f'\n__version__ = {__version__}',
             ]
         )
     )
+    return files
     
-def check_cimple(root: str):
-    _CIM_BUILT = (Path(root).parent / 'cim').exists()
+def file_fingerprint(path: str) -> list[Any]:
+    """Path, modification time and size, which change when a file is installed or edited"""
+    stat = os.stat(path)
+    return [path, stat.st_mtime_ns, stat.st_size]
+
+def arcpy_fingerprint() -> list[Any] | None:
+    """Find arcpy without importing it, None if it isn't installed"""
+    spec = find_spec('arcpy')
+    if spec is None or spec.origin is None:
+        return None
+    return file_fingerprint(spec.origin)
+
+def source_hash(source: str) -> str:
+    return hashlib.blake2b(source.encode('utf-8'), digest_size=8).hexdigest()
+
+# Modules the generated code is built from: this module and every cimple module the generated code imports
+GENERATOR_INPUTS = ('_build.py', '_info.py')
+
+def generator_hash() -> str:
+    """Hash of the generator inputs, which only changes when one of them does (not when they are copied)"""
+    root = Path(__file__).parent
+    return source_hash(
+        '\n'.join(f'{name}\n{(root / name).read_text(encoding="utf-8")}' for name in GENERATOR_INPUTS)
+    )
+
+def schema_hash(modules: dict[str, str]) -> str:
+    """Hash of a cim package from the source hash of each of its modules"""
+    return source_hash(json.dumps(modules, sort_keys=True))
+
+def write_stamp(out: Path, modules: dict[str, str]) -> None:
+    """Write the stamp of the package in out, replacing it in one step"""
+    stamp = out / STAMP.name
+    tmp = stamp.with_name(f'{stamp.name}.{os.getpid()}')
+    tmp.write_text(
+        json.dumps(
+            {
+                'cimple': __version__,
+                'arcpy': get_arcpy_version(),
+                'schema': schema_hash(modules),
+                'modules': modules,
+                # Changes to the generator or arcpy are found without importing them
+                'generator': generator_hash(),
+                'arcpy_file': arcpy_fingerprint(),
+            }
+        )
+    )
+    os.replace(tmp, stamp)
 
+def read_stamp() -> dict[str, Any] | None:
+    """The stamp of the built cim package, None if it isn't built (or was built without a stamp)"""
+    try:
+        return json.loads(STAMP.read_text())
+    except (OSError, ValueError):
+        return None
+
+def check_stamp(stamp: dict[str, Any] | None) -> str | None:
+    """Why the cim package needs to be built, None if the stamp is current"""
     # If this module is imported and the cim submodule isn't generated, 
     # generate it
-    if not _CIM_BUILT:
-        print(f'Building cimple.cim')
-        build_cim()
+    if stamp is None:
+        return 'Building cimple.cim'
+    try:
+        if tuple(stamp['cimple']) < __version__ or stamp['generator'] != generator_hash():
+            return 'Updating cimple.cim'
+        # arcpy is only imported to read its version when it changed since the
+        # build, without arcpy installed the existing build is used as is
+        if (fingerprint := arcpy_fingerprint()) != stamp['arcpy_file'] and fingerprint is not None:
+            if tuple(stamp['arcpy']) < get_arcpy_version():
+                return 'Updating cimple.cim'
+            stamp['arcpy_file'] = fingerprint
+            # Replaced in one step, other processes may be reading it
+            tmp = STAMP.with_name(f'{STAMP.name}.{os.getpid()}')
+            tmp.write_text(json.dumps(stamp))
+            os.replace(tmp, STAMP)
+    except Exception as e:
+        return f'{e}\nRebuilding cimple.cim'
+    return None
 
-    elif _CIM_BUILT:
+def check_cimple(root: str):
+    # The stamp is read instead of importing the generated package, so a
+    # rebuild never leaves stale modules imported in this process
+    if check_stamp(read_stamp()) is None:
+        return
+    # Processes that start together wait for the first one to build, and
+    # check again once it is done
+    with build_lock():
+        stamp = read_stamp()
+        if (reason := check_stamp(stamp)) is None:
+            return
+        print(reason)
         try:
-            from .cim import (
-            __cim_version__,
-            __version__ as __existing_version__,
-        )
-            if (
-            __cim_version__ < __arcpy_version__  # type: ignore
-            or
-            __existing_version__ < __version__
-        ):
-                print(f'Updating cimple.cim')
-                build_cim()
-        except Exception as e:
-            print(e)
-            print(f'Rebuilding cimple.cim')
-            build_cim()
\ No newline at end of file
+            _build_cim()
+        except ImportError as e:
+            # Nothing is written until arcpy is imported, so a stale build is
+            # still complete and is used until arcpy can be imported again
+            if stamp is None:
+                raise
+            warnings.warn(f'cimple.cim could not be rebuilt without arcpy ({e}), using the existing build')
@@ -0,0 +1,78 @@
+"""Explicit stack traversal used by the converters
+
+A converter is written as a shell function that converts a single value. Nested
+values that still need converting are scheduled with `schedule(container, key)`
+and are converted in place after the shell returns, so deeply nested trees
+never grow the Python stack.
+"""
+from typing import Any, Callable
+
+# Schedule container[key] to be converted in place, optionally with its field kind
+Schedule = Callable[..., None]
+
+# Convert a single value (with its field kind) and schedule its children
+Shell = Callable[[Any, str | None, Schedule], Any]
+
+# Values that are never converted unless their field kind needs it
+LEAVES = frozenset({str, int, float, bool, type(None)})
+
+
+class ConversionMemo:
+    """Converts every distinct object once when passed to a converter
+    
+    Objects referenced from more than one place are converted on first sight and
+    the result is reused for every other reference, which preserves identity and 
+    makes cyclic structures safe to convert. Use one memo per direction, a memo 
+    filled by `cim_to_cimple` can't be reused by `cimple_to_cim`.
+    """
+    __slots__ = ('results', 'saved')
+    
+    def __init__(self) -> None:
+        # id(source): (source, result), the source is kept so its id isn't reused
+        self.results: dict[int, tuple[Any, Any]] = {}
+        # Number of conversions skipped by reusing a result
+        self.saved = 0
+    
+    @property
+    def converted(self) -> int:
+        """Number of distinct values converted"""
+        return len(self.results)
+    
+    def __repr__(self) -> str:
+        return f'ConversionMemo(converted={self.converted}, saved={self.saved})'
+
+
+def traverse(root: Any, shell: Shell, memo: ConversionMemo | None = None) -> Any:
+    """Convert root and everything nested in it using shell"""
+    box = [root]
+    stack: list[tuple[Any, Any, str | None]] = [(box, 0, None)]
+    push = stack.append
+    pop = stack.pop
+    
+    def schedule(container: Any, key: Any, kind: str | None = None) -> None:
+        if kind is None and container[key].__class__ in LEAVES:
+            return
+        push((container, key, kind))
+    
+    if memo is None:
+        while stack:
+            container, key, kind = pop()
+            container[key] = shell(container[key], kind, schedule)
+        return box[0]
+    
+    # The result is stored as soon as the shell returns and before any of its
+    # children are converted, so references back to an ancestor reuse it
+    results = memo.results
+    while stack:
+        container, key, kind = pop()
+        value = container[key]
+        # Values converted by field kind (datetime strings, etc.) aren't shared
+        if kind is not None:
+            container[key] = shell(value, kind, schedule)
+        elif (seen := results.get(id(value))) is not None:
+            container[key] = seen[1]
+            memo.saved += 1
+        else:
+            container[key] = result = shell(value, kind, schedule)
+            results[id(value)] = (value, result)
+    return box[0]
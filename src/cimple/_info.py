@@ -0,0 +1,126 @@
+"""Class metadata used by the generated cim package
+
+`cimple.cim._registry` creates a `CIMClassInfo` for every generated class with
+its fields, defaults, field kinds and generated codecs and converters. Only that
+per-class data is generated, the code that uses it lives here.
+"""
+from __future__ import annotations
+
+from importlib import import_module
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from .cim._base import CIMBase
+
+# Kinds with JSON values that need converting (datetime strings, esri json
+# geometries, nan/inf strings, and untyped fields that may hold geometries)
+DECODED_KINDS = ('datetime', 'geometry', 'spatial_reference', 'nan', 'inf', 'any')
+
+
+class CIMClassInfo:
+    """Build metadata for a cimple class and its matching arcpy.cim class"""
+    __slots__ = (
+        'name', 'cls', 'cim_module', 'fields', 'defaults', 'children', 'kinds', 'decoded', 'floats',
+        'to_dict', 'to_sparse_dict', 'from_dict', 'to_cim', 'to_cimple', '_cim_cls',
+        '_get_values',
+    )
+
+    def __init__(
+        self,
+        cls: type[CIMBase],
+        cim_module: str,
+        fields: tuple[str, ...],
+        defaults: dict[str, object],
+        children: tuple[str, ...],
+        kinds: dict[str, str],
+        to_dict: Callable[[Any, Callable[..., None]], dict[str, Any]],
+        to_sparse_dict: Callable[[Any, Callable[..., None]], dict[str, Any]],
+        from_dict: Callable[[dict[str, Any], Callable[..., None]], Any],
+        to_cim: Callable[[Any, Callable[..., None], type], Any],
+        to_cimple: Callable[[Any, Callable[..., None]], Any],
+    ) -> None:
+        self.name = cls.__name__
+        self.cls = cls
+        self.cim_module = cim_module
+        # All fields in declaration order
+        self.fields = fields
+        # Fields with a plain default, default_factory fields are omitted
+        self.defaults = defaults
+        # Fields that can hold nested CIM objects
+        self.children = children
+        # Field kind of every field (see cimple._build.field_kind)
+        self.kinds = kinds
+        # Fields that need their JSON value converted when decoding
+        self.decoded = {f: k for f, k in kinds.items() if k in DECODED_KINDS}
+        # Float fields, only decoded when they hold an "inf" or "-inf" string
+        self.floats = tuple(f for f, k in kinds.items() if k == 'float')
+        # Generated codecs (see cim._codecs)
+        self.to_dict = to_dict
+        self.to_sparse_dict = to_sparse_dict
+        self.from_dict = from_dict
+        # Generated converters (see cim._converters)
+        self.to_cim = to_cim
+        self.to_cimple = to_cimple
+        self._cim_cls: type | None = None
+        self._get_values = itemgetter(*fields) if len(fields) > 1 else lambda d: tuple(d[f] for f in fields)
+        _INFOS[self.name] = self
+
+    @property
+    def cim_cls(self) -> type:
+        # Only import the arcpy.cim module when an arcpy class is requested
+        if self._cim_cls is None:
+            self._cim_cls = getattr(import_module(self.cim_module), self.name)
+        return self._cim_cls
+
+    def new(self, s: dict[str, Any]) -> CIMBase:
+        """Create an object with s (decoded field values) as its __dict__
+
+        Incomplete fields are filled in by from_dict, which also keeps unknown fields after
+        the known ones. Nested values are used as is
+        """
+        if len(s) != len(self.fields) or not s.keys() <= self.kinds.keys():
+            return self.from_dict(s, _noop)
+        o = object.__new__(self.cls)
+        object.__setattr__(o, '__dict__', s)
+        return o
+
+    def reduce(self, o: CIMBase, protocol: int) -> tuple[Any, ...]:
+        """Pickle o as its class name and field values"""
+        d = o.__dict__
+        try:
+            values = self._get_values(d)
+        except KeyError:
+            # A field was deleted, pickle the __dict__ as is
+            return object.__reduce_ex__(o, protocol)
+        if len(d) != len(self.fields):
+            # Attributes set outside the fields are pickled by name
+            return _restore, (self.name, values, {k: v for k, v in d.items() if k not in self.kinds})
+        return _restore, (self.name, values)
+
+    def __repr__(self) -> str:
+        return f'CIMClassInfo({self.name})'
+
+
+# Every CIMClassInfo by class name, filled in by cim._registry
+_INFOS: dict[str, CIMClassInfo] = {}
+
+
+def _noop(*args: object) -> None: ...
+
+
+def _extra(d: dict[str, Any], cls: type) -> list[str]:
+    """Keys of d that aren't fields of cls or the type discriminator"""
+    fields = cls.__dataclass_fields__  # type: ignore
+    return [k for k in d if k not in fields and k != 'type']
+
+
+def _restore(name: str, values: tuple[Any, ...], extra: dict[str, Any] | None = None) -> CIMBase:
+    """Unpickle an object pickled by CIMClassInfo.reduce"""
+    info = _INFOS[name]
+    d = dict(zip(info.fields, values))
+    if extra:
+        d.update(extra)
+    o = object.__new__(info.cls)
+    object.__setattr__(o, '__dict__', d)
+    return o
@@ -0,0 +1,136 @@
+"""JSON parser backends for the JSON to cimple converters
+
+`json_to_cimple` (and `Batch`, `map_documents`) parse documents with the
+stdlib json module by default. msgspec and orjson can be picked with
+`CIMPLE_JSON_BACKEND` or `set_backend`:
+
+    set_backend('msgspec')
+
+Every backend returns the same values as `json.loads`. Documents that a fast
+backend would read differently (NaN, Infinity, out of range numbers or, for
+orjson, integers wider than 64 bits) are parsed by the stdlib instead. Documents
+written without a profile hold Infinity, so only documents written with the
+sparse or compact profile are parsed faster by them (see
+benchmarks/bench_backends.py), which is why the stdlib stays the default.
+
+Encoding always uses the stdlib encoder, orjson and msgspec can't reproduce its
+output (indentation, separators, ascii escapes and float formatting).
+"""
+import json
+import os
+from typing import Any, Callable
+
+# Digits to 0, minus signs kept and every other byte to a space, so digit runs
+# are found with a substring search instead of a regex over every number
+_DIGIT_RUNS = bytes(
+    ord('0') if chr(i) in '0123456789' else ord('-') if chr(i) == '-' else ord(' ')
+    for i in range(256)
+)
+
+
+def _nonfinite(s: str | bytes) -> bool:
+    """If s holds NaN or Infinity, which msgspec and orjson can't read
+
+    Documents written without a profile hold Infinity (default maxScale), which
+    is checked first, so the search usually stops early
+    """
+    if isinstance(s, str):
+        return 'Infinity' in s or 'NaN' in s
+    return b'Infinity' in s or b'NaN' in s
+
+
+def _wide(s: str | bytes) -> bool:
+    """If s may hold an integer outside of int64 and uint64, which orjson reads as a float
+
+    They have at least 20 digits, or at least 19 digits after a minus sign
+    """
+    if isinstance(s, str):
+        s = s.encode('utf-8')
+    runs = s.translate(_DIGIT_RUNS)
+    return b'0' * 20 in runs or b'-' + b'0' * 19 in runs
+
+
+class JSONBackend:
+    """A JSON parser that falls back to json.loads for documents it can't read identically"""
+    __slots__ = ('name', '_loads', '_errors', '_check')
+
+    def __init__(
+        self,
+        name: str,
+        loads: Callable[[str | bytes], Any],
+        errors: tuple[type[Exception], ...] = (),
+        check: Callable[[str | bytes], bool] | None = None,
+    ) -> None:
+        self.name = name
+        self._loads = loads
+        # Errors raised for valid JSON the backend doesn't support
+        self._errors = errors
+        # Documents that pass check are parsed with json.loads
+        self._check = check
+
+    def loads(self, s: str | bytes) -> Any:
+        if self._check is not None and self._check(s):
+            return json.loads(s)
+        try:
+            return self._loads(s)
+        except self._errors:
+            return json.loads(s)
+
+    def __repr__(self) -> str:
+        return f'JSONBackend({self.name})'
+
+
+def _orjson() -> JSONBackend:
+    import orjson
+
+    return JSONBackend(
+        'orjson', orjson.loads, (orjson.JSONDecodeError,), lambda s: _nonfinite(s) or _wide(s)
+    )
+
+
+def _msgspec() -> JSONBackend:
+    import msgspec
+
+    return JSONBackend('msgspec', msgspec.json.Decoder().decode, (msgspec.DecodeError,), _nonfinite)
+
+
+def _stdlib() -> JSONBackend:
+    return JSONBackend('stdlib', json.loads)
+
+
+# Backends in order of preference, the fast backends are only faster for
+# documents without NaN or Infinity, so they have to be picked
+BACKENDS: dict[str, Callable[[], JSONBackend]] = {
+    'stdlib': _stdlib,
+    'msgspec': _msgspec,
+    'orjson': _orjson,
+}
+
+
+def set_backend(name: str | None = None) -> JSONBackend:
+    """Use the named backend, or the first installed backend in BACKENDS if name is None"""
+    global _backend
+    if name is not None:
+        if name not in BACKENDS:
+            raise ValueError(f'Unknown JSON backend {name!r}, expected one of {list(BACKENDS)}')
+        _backend = BACKENDS[name]()
+        return _backend
+    for factory in BACKENDS.values():
+        try:
+            _backend = factory()
+        except ImportError:
+            continue
+        return _backend
+    raise ImportError('No JSON backend is available')
+
+
+def get_backend() -> JSONBackend:
+    return _backend
+
+
+def loads(s: str | bytes) -> Any:
+    """Parse a JSON document with the current backend"""
+    return _backend.loads(s)
+
+
+_backend: JSONBackend = set_backend(os.environ.get('CIMPLE_JSON_BACKEND') or None)
@@ -0,0 +1,124 @@
+"""Convert many CIM documents with shared state
+
+The single document converters build a new json encoder or decoder on every
+call. A `Batch` builds them once and reuses them (and optionally an identity
+memo for the cim converters) for every document it converts:
+
+    batch = Batch()
+    for layer in batch.json_to_cimple(texts):
+        ...
+    print(batch.stats)
+"""
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator
+
+from . import backends
+from ._engine import ConversionMemo, traverse
+from .profiles import EncodingProfile, get_profile
+from .conversion import (
+    cimJSONDecoder,
+    cimJSONEncoder,
+    cimpleJSONEncoder,
+    _from_json_shell,
+    _json_shell,
+    _to_cim_shell,
+    _to_cimple_shell,
+)
+
+
+class BatchStats:
+    """Throughput of the last batch a `Batch` converted"""
+    __slots__ = ('documents', 'seconds', 'chars')
+
+    def __init__(self) -> None:
+        self.documents = 0
+        # Time spent converting, time spent by the consumer of the batch is excluded
+        self.seconds = 0.0
+        # Characters of JSON read or written
+        self.chars = 0
+
+    @property
+    def per_second(self) -> float:
+        """Documents converted per second"""
+        return self.documents / self.seconds if self.seconds else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f'BatchStats(documents={self.documents}, seconds={self.seconds:.3f}, '
+            f'chars={self.chars}, per_second={self.per_second:,.0f})'
+        )
+
+
+class Batch:
+    """Converters that share encoders, decoders and memos across documents
+
+    Every converter takes an iterable of documents and lazily yields the
+    converted documents in order. `stats` is reset when a batch starts.
+    A profile (see `cimple.profiles`) replaces indent for both JSON encoders.
+
+    With `memo=True` the cim converters keep one `ConversionMemo` per direction
+    for the lifetime of the Batch, so objects shared between documents are
+    converted once and keep their identity across the whole batch.
+    """
+
+    def __init__(self, indent: int | None = 4, memo: bool = False, profile: str | EncodingProfile | None = None) -> None:
+        self.stats = BatchStats()
+        self.profile = None if profile is None else get_profile(profile)
+        self._cim_decoder = cimJSONDecoder()
+        if self.profile is None:
+            self._encoder = cimpleJSONEncoder(indent=indent)
+            self._cim_encoder = cimJSONEncoder()
+        else:
+            self._encoder = self.profile.encoder(cimpleJSONEncoder)
+            self._cim_encoder = self.profile.encoder(cimJSONEncoder)
+        self.to_cim_memo = ConversionMemo() if memo else None
+        self.to_cimple_memo = ConversionMemo() if memo else None
+
+    def _run(self, documents: Iterable[Any], convert: Callable[[Any], Any], json_in: bool = False) -> Iterator[Any]:
+        self.stats = stats = BatchStats()
+        for document in documents:
+            start = perf_counter()
+            result = convert(document)
+            stats.seconds += perf_counter() - start
+            stats.documents += 1
+            if json_in:
+                stats.chars += len(document)
+            elif result.__class__ is str:
+                stats.chars += len(result)
+            yield result
+
+    # cimple <--> json
+    def cimple_to_json(self, documents: Iterable[object]) -> Iterator[str]:
+        encode = self._encoder.encode
+        shell = _json_shell(self.profile)
+        if self.profile is not None and self.profile.rewrites:
+            apply = self.profile.apply
+            return self._run(documents, lambda doc: encode(apply(traverse(doc, shell))))
+        return self._run(documents, lambda doc: encode(traverse(doc, shell)))
+
+    def json_to_cimple(self, documents: Iterable[str | bytes]) -> Iterator[object]:
+        loads = backends.get_backend().loads
+        return self._run(documents, lambda doc: traverse(loads(doc), _from_json_shell), json_in=True)
+
+    # cimple <--> cim
+    def cimple_to_cim(self, documents: Iterable[object]) -> Iterator[object]:
+        return self._run(documents, lambda doc: traverse(doc, _to_cim_shell, self.to_cim_memo))
+
+    def cim_to_cimple(self, documents: Iterable[object]) -> Iterator[object]:
+        return self._run(documents, lambda doc: traverse(doc, _to_cimple_shell, self.to_cimple_memo))
+
+    # cim <--> json
+    def cim_to_json(self, documents: Iterable[object]) -> Iterator[str]:
+        if self.profile is not None and (self.profile.rewrites or self.profile.elide_defaults):
+            # Profiles rewrite the JSON ready documents built by the cimple codecs
+            encode = self._encoder.encode
+            apply = self.profile.apply
+            shell = _json_shell(self.profile)
+            return self._run(
+                documents, 
+                lambda doc: encode(apply(traverse(traverse(doc, _to_cimple_shell), shell))),
+            )
+        return self._run(documents, self._cim_encoder.encode)
+
+    def json_to_cim(self, documents: Iterable[str]) -> Iterator[object]:
+        return self._run(documents, self._cim_decoder.decode, json_in=True)
@@ -0,0 +1,473 @@
+"""Compact binary format for cimple objects
+
+`cimple_to_bytes` writes the same document as `cimple_to_json(profile='sparse')`
+in a tagged binary layout that uses the generated class registry:
+
+- Classes and fields are written as their index in the registry
+- Literal fields are written as their code in the generated `literals.X_Map`
+- Floats are written as native little-endian doubles, and lists of floats
+  (coordinates, color values, etc.) as packed double arrays
+- Integers and lengths are written as (zigzag) varints
+- Lists, dicts and objects are prefixed with their size in bytes (uint32), so
+  a value can be skipped without reading it
+
+Buffers start with a header holding the format version and a hash of the
+registry, so a buffer is only read by a build with the same classes, fields
+and literal codes. `bytes_to_cimple` decodes buffers to objects equal to
+those decoded from the JSON of the same document.
+
+`open_view` reads a buffer in place instead. Views are read-only accessors in
+the style of FlatBuffers: attribute access on an object view finds the field 
+by its offset in the buffer and only reads that value, so reading a few fields
+of a large document never builds the rest of it. Views work over any buffer,
+including memory mapped files:
+
+    with open('symbols.cimb', 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        layer = open_view(m)
+        print(layer.name, layer.renderer.symbol.symbol.symbolLayers[0].type)
+        del layer  # views hold the buffer until they are released
+"""
+import hashlib
+import json
+import struct
+import sys
+from dataclasses import fields as dc_fields
+from functools import cache
+from typing import Any, Iterator
+
+from ._engine import traverse
+from .conversion import _from_json_shell, _to_sparse_json_shell
+from .stream import _json_key
+from .cim import literals
+from .cim._registry import REGISTRY
+
+# Value tags
+NONE, FALSE, TRUE, INT, FLOAT, STR, LIST, DICT, OBJECT, LITERAL, FLOATS = range(11)
+
+MAGIC = b'CIMB'
+VERSION = 2
+
+
+class _ClassPlan:
+    """Binary ids of a class, its fields and the literal codes of its fields"""
+    __slots__ = ('name', 'id', 'fields', 'field_ids', 'codes', 'names')
+
+    def __init__(self, name: str, class_id: int) -> None:
+        info = REGISTRY[name]
+        self.name = name
+        self.id = class_id
+        self.fields = info.fields
+        self.field_ids = {f: i for i, f in enumerate(info.fields)}
+        # Literal name to code and code to name by field id, None for other fields
+        self.codes: list[dict[str, int] | None] = [None] * len(info.fields)
+        self.names: list[dict[int, str] | None] = [None] * len(info.fields)
+        types = {f.name: f.type for f in dc_fields(info.cls)}
+        for i, f in enumerate(info.fields):
+            if info.kinds[f] != 'literal':
+                continue
+            codes = getattr(literals, f'{types[f]}_Map', None)
+            # Codes that aren't unique can't be decoded back to a name
+            if codes and len(set(codes.values())) == len(codes):
+                self.codes[i] = codes
+                self.names[i] = {code: name for name, code in codes.items()}
+
+
+# Plans and the header cover every registered class, so they are built on first use
+
+@cache
+def _plans_by_id() -> list[_ClassPlan]:
+    """The plan of every registered class, the class id is its index"""
+    return [_ClassPlan(name, i) for i, name in enumerate(sorted(REGISTRY))]
+
+
+@cache
+def _plans() -> dict[str, _ClassPlan]:
+    """The plan of every registered class by name"""
+    return {plan.name: plan for plan in _plans_by_id()}
+
+
+@cache
+def _header() -> bytes:
+    """MAGIC, VERSION and a hash of the class and field ids and the literal codes"""
+    schema_hash = hashlib.blake2b(
+        repr([(p.name, p.fields, p.codes) for p in _plans_by_id()]).encode(),
+        digest_size=8,
+    ).digest()
+    return MAGIC + bytes([VERSION]) + schema_hash
+
+
+HEADER_SIZE = len(MAGIC) + 1 + 8
+
+_pack_double = struct.Struct('<d').pack
+_unpack_double = struct.Struct('<d').unpack_from
+_pack_size = struct.Struct('<I').pack_into
+_unpack_size = struct.Struct('<I').unpack_from
+
+# Marks the end of a container on the writer stack
+_END = object()
+
+# Dict keys are converted to strings like json.dumps does
+_KEY_ENCODER = json.JSONEncoder()
+
+
+def _write_varint(out: bytearray, n: int) -> None:
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _encode(root: Any) -> bytearray:
+    out = bytearray(_header())
+    plans = _plans()
+    append = out.append
+    # (value, literal codes of the field holding it) or (_END, start of a container)
+    stack: list[tuple[Any, Any]] = [(root, None)]
+    push = stack.append
+    pop = stack.pop
+
+    def open_container(tag: int) -> None:
+        # The size is filled in once every value in the container is written
+        append(tag)
+        push((_END, len(out)))
+        out.extend(b'\0\0\0\0')
+
+    while stack:
+        value, codes = pop()
+        cls = value.__class__
+        if value is _END:
+            _pack_size(out, codes, len(out) - codes - 4)
+        elif cls is str:
+            if codes is not None and (code := codes.get(value)) is not None:
+                append(LITERAL)
+                _write_varint(out, code << 1 if code >= 0 else (~code << 1) | 1)
+            else:
+                data = value.encode('utf-8')
+                append(STR)
+                _write_varint(out, len(data))
+                out += data
+        elif value is None:
+            append(NONE)
+        elif cls is bool:
+            append(TRUE if value else FALSE)
+        elif cls is int:
+            append(INT)
+            _write_varint(out, value << 1 if value >= 0 else (~value << 1) | 1)
+        elif cls is float:
+            append(FLOAT)
+            out += _pack_double(value)
+        elif cls is list or cls is tuple:
+            if value and all(v.__class__ is float for v in value):
+                append(FLOATS)
+                _write_varint(out, len(value))
+                out += struct.pack(f'<{len(value)}d', *value)
+            else:
+                open_container(LIST)
+                _write_varint(out, len(value))
+                for v in reversed(value):
+                    push((v, None))
+        elif cls is dict:
+            plan = plans.get(value.get('type'))  # type: ignore
+            keys = [k for k in value if k != 'type'] if plan is not None else list(value)
+            if plan is not None and all(k in plan.field_ids for k in keys):
+                # Field ids are written before the values
+                open_container(OBJECT)
+                _write_varint(out, plan.id)
+                _write_varint(out, len(keys))
+                ids = [plan.field_ids[k] for k in keys]
+                for i in ids:
+                    _write_varint(out, i)
+                for i, k in zip(reversed(ids), reversed(keys)):
+                    push((value[k], plan.codes[i]))
+            else:
+                # Keys are written before the values, objects with keys that
+                # aren't fields keep their type discriminator as a key
+                keys = list(value)
+                open_container(DICT)
+                _write_varint(out, len(keys))
+                for k in keys:
+                    data = _json_key(k, _KEY_ENCODER).encode('utf-8')  # type: ignore
+                    _write_varint(out, len(data))
+                    out += data
+                for k in reversed(keys):
+                    push((value[k], None))
+        else:
+            raise TypeError(f'Object of type {cls.__name__} is not binary serializable')
+    return out
+
+
+def _check_header(data: bytes | bytearray | memoryview) -> memoryview:
+    view = memoryview(data).toreadonly()
+    if view.format != 'B':
+        view = view.cast('B')
+    if bytes(view[:HEADER_SIZE]) != _header():
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError('Not a cimple binary buffer')
+        raise ValueError('cimple binary buffer was written by a different cimple.cim build')
+    return view
+
+
+def _read_varint(view: memoryview, pos: int) -> tuple[int, int]:
+    """Read the varint at pos, returns the int and the position after it"""
+    shift = result = 0
+    while True:
+        b = view[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_str(view: memoryview, pos: int) -> tuple[str, int]:
+    n, pos = _read_varint(view, pos)
+    return str(view[pos:pos + n], 'utf-8'), pos + n
+
+
+def _skip(view: memoryview, pos: int) -> int:
+    """Position after the value at pos"""
+    tag = view[pos]
+    pos += 1
+    if tag in (LIST, DICT, OBJECT):
+        return pos + 4 + _unpack_size(view, pos)[0]
+    if tag == FLOAT:
+        return pos + 8
+    if tag in (INT, LITERAL):
+        while view[pos] & 0x80:
+            pos += 1
+        return pos + 1
+    if tag in (STR, FLOATS):
+        n, pos = _read_varint(view, pos)
+        return pos + (8 * n if tag == FLOATS else n)
+    return pos
+
+
+def _decode(view: memoryview, pos: int, names: dict[int, str] | None = None) -> Any:
+    """Decode the value at pos to a JSON ready value"""
+    plans = _plans_by_id()
+    box: list[Any] = [None]
+    # Containers being filled: [container, keys, literal names by slot, next slot]
+    frames: list[list[Any]] = [[box, [0], [names], 0]]
+    while frames:
+        frame = frames[-1]
+        container, keys, names_by_slot, i = frame
+        if i == len(keys):
+            frames.pop()
+            continue
+        frame[3] = i + 1
+        tag = view[pos]
+        pos += 1
+        if tag == STR:
+            value, pos = _read_str(view, pos)
+        elif tag == FLOAT:
+            value = _unpack_double(view, pos)[0]
+            pos += 8
+        elif tag == INT or tag == LITERAL:
+            n, pos = _read_varint(view, pos)
+            value = ~(n >> 1) if n & 1 else n >> 1
+            if tag == LITERAL:
+                value = names_by_slot[i][value]  # type: ignore
+        elif tag == NONE:
+            value = None
+        elif tag == TRUE:
+            value = True
+        elif tag == FALSE:
+            value = False
+        elif tag == FLOATS:
+            n, pos = _read_varint(view, pos)
+            value = list(struct.unpack_from(f'<{n}d', view, pos))
+            pos += 8 * n
+        elif tag == LIST:
+            n, pos = _read_varint(view, pos + 4)
+            value = [None] * n
+            if n:
+                frames.append([value, range(n), None, 0])
+        elif tag == OBJECT:
+            class_id, pos = _read_varint(view, pos + 4)
+            plan = plans[class_id]
+            n, pos = _read_varint(view, pos)
+            ids = []
+            for _ in range(n):
+                field_id, pos = _read_varint(view, pos)
+                ids.append(field_id)
+            value = {'type': plan.name}
+            frames.append([value, [plan.fields[i] for i in ids], [plan.names[i] for i in ids], 0])
+        elif tag == DICT:
+            n, pos = _read_varint(view, pos + 4)
+            dict_keys = []
+            for _ in range(n):
+                key, pos = _read_str(view, pos)
+                dict_keys.append(key)
+            value = {}
+            frames.append([value, dict_keys, None, 0])
+        else:
+            raise ValueError(f'Invalid tag {tag} at {pos - 1}')
+        container[keys[i]] = value
+    return box[0]
+
+
+# Views
+
+# Packed doubles can be cast in place on little-endian machines
+_CAST_DOUBLES = sys.byteorder == 'little'
+
+
+def _view_value(view: memoryview, pos: int, names: dict[int, str] | None, children: dict[int, Any]) -> Any:
+    """The value at pos, containers are returned as views
+    
+    Views are kept in children (of the parent view) by their position, so reading 
+    the items of a list through its parent doesn't scan the list every time
+    """
+    tag = view[pos]
+    if tag == OBJECT or tag == LIST or tag == DICT:
+        if (container := children.get(pos)) is None:
+            cls = ObjectView if tag == OBJECT else ListView if tag == LIST else DictView
+            container = children[pos] = cls(view, pos)
+        return container
+    if tag == FLOATS and _CAST_DOUBLES:
+        n, start = _read_varint(view, pos + 1)
+        try:
+            return view[start:start + 8 * n].cast('d')
+        except TypeError:
+            pass
+    return _decode(view, pos, names)
+
+
+class ObjectView:
+    """Read-only view of a cimple object in a binary buffer
+    
+    Fields are read from the buffer when they are accessed. Nested objects, lists
+    and dicts are returned as views, float lists as memoryviews of doubles and 
+    other values as they are written to JSON. Fields left out of the buffer 
+    return their default.
+    """
+    __slots__ = ('_view', '_pos', '_plan', '_offsets', '_children')
+
+    def __init__(self, view: memoryview, pos: int) -> None:
+        self._view = view
+        self._pos = pos
+        self._children: dict[int, Any] = {}
+        class_id, p = _read_varint(view, pos + 5)
+        self._plan = plan = _plans_by_id()[class_id]
+        n, p = _read_varint(view, p)
+        ids = []
+        for _ in range(n):
+            field_id, p = _read_varint(view, p)
+            ids.append(field_id)
+        # Offset of every field in the buffer
+        offsets: dict[str, int] = {}
+        for field_id in ids:
+            offsets[plan.fields[field_id]] = p
+            p = _skip(view, p)
+        self._offsets = offsets
+
+    @property
+    def type(self) -> str:
+        return self._plan.name
+
+    def __getattr__(self, name: str) -> Any:
+        plan = self._plan
+        if (field_id := plan.field_ids.get(name)) is None:
+            raise AttributeError(f'{plan.name!r} view has no field {name!r}')
+        if (pos := self._offsets.get(name)) is not None:
+            return _view_value(self._view, pos, plan.names[field_id], self._children)
+        info = REGISTRY[plan.name]
+        if name in info.defaults:
+            return info.defaults[name]
+        return {'list': [], 'dict': {}}.get(info.kinds[name])
+
+    def __dir__(self) -> list[str]:
+        return ['type', *self._plan.fields]
+
+    def __repr__(self) -> str:
+        return f'ObjectView({self._plan.name})'
+
+    def to_cimple(self) -> object:
+        """Decode the viewed object"""
+        return traverse(_decode(self._view, self._pos), _from_json_shell)
+
+
+class ListView:
+    """Read-only view of a list in a binary buffer
+    
+    Only the length is read up front, item offsets are found on the first index
+    """
+    __slots__ = ('_view', '_len', '_start', '_offsets', '_children')
+
+    def __init__(self, view: memoryview, pos: int) -> None:
+        self._view = view
+        self._len, self._start = _read_varint(view, pos + 5)
+        self._offsets: list[int] | None = None
+        self._children: dict[int, Any] = {}
+
+    def _items(self) -> Iterator[int]:
+        """Offset of every item"""
+        view, p = self._view, self._start
+        for _ in range(self._len):
+            yield p
+            p = _skip(view, p)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, index: int) -> Any:
+        if self._offsets is None:
+            self._offsets = list(self._items())
+        return _view_value(self._view, self._offsets[index], None, self._children)
+
+    def __iter__(self) -> Iterator[Any]:
+        for pos in self._offsets if self._offsets is not None else self._items():
+            yield _view_value(self._view, pos, None, self._children)
+
+    def __repr__(self) -> str:
+        return f'ListView(len={len(self)})'
+
+
+class DictView:
+    """Read-only view of a plain dict in a binary buffer"""
+    __slots__ = ('_view', '_offsets', '_children')
+
+    def __init__(self, view: memoryview, pos: int) -> None:
+        self._view = view
+        self._children: dict[int, Any] = {}
+        n, p = _read_varint(view, pos + 5)
+        keys = []
+        for _ in range(n):
+            key, p = _read_str(view, p)
+            keys.append(key)
+        offsets: dict[str, int] = {}
+        for key in keys:
+            offsets[key] = p
+            p = _skip(view, p)
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, key: str) -> Any:
+        return _view_value(self._view, self._offsets[key], None, self._children)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._offsets)
+
+    def keys(self) -> Iterator[str]:
+        return iter(self._offsets)
+
+    def __repr__(self) -> str:
+        return f'DictView({list(self._offsets)})'
+
+
+def open_view(data: bytes | bytearray | memoryview | Any) -> Any:
+    """View the document in a buffer written by `cimple_to_bytes` without decoding it"""
+    view = _check_header(data)
+    return _view_value(view, HEADER_SIZE, None, {})
+
+
+def cimple_to_bytes(cimple_obj: object) -> bytes:
+    """Encode a cimple object in the cimple binary format"""
+    return bytes(_encode(traverse(cimple_obj, _to_sparse_json_shell)))
+
+
+def bytes_to_cimple(data: bytes | bytearray | memoryview) -> object:
+    """Decode a buffer written by `cimple_to_bytes`"""
+    return traverse(_decode(_check_header(data), HEADER_SIZE), _from_json_shell)
@@ -1,113 +1,251 @@
-from enum import EnumType
+from enum import Enum
 import json
 from dataclasses import is_dataclass
-from arcpy import (
-    AsShape,
-    SpatialReference,
-    cim as arcpy_cim,
-)
 from datetime import datetime
 import math
 
-from ._build import check_cimple
-# ensure cimple.cim is built
-check_cimple(__file__)
-from . import cim
+from . import backends
+from .geometry import JSONGeometry, JSONSpatialReference, as_shape, as_spatial_reference, to_json
+from ._engine import ConversionMemo, Schedule, Shell, traverse
+from .profiles import EncodingProfile, get_profile
+# cimple.cim is checked (and built) by the package __init__ before any submodule is imported
+from ._info import CIMClassInfo
+from .cim._registry import REGISTRY
 
 # Encoders
 class cimpleJSONEncoder(json.JSONEncoder):
-    _cim = cim
     def default(self, o: object) -> object:
+        # The type discriminator is written first (see cimpleJSONDecoder)
         if is_dataclass(o) and not isinstance(o, type):
-            o_dict = o.__dict__.copy()
-            o_dict['type'] = o.__class__.__name__
-            return o_dict
+            return {'type': o.__class__.__name__, **o.__dict__}
         if isinstance(o, datetime):
             return o.isoformat()
+        if (esri_json := to_json(o)) is not None:
+            return esri_json
         return super().default(o)
 
 class cimJSONEncoder(cimpleJSONEncoder):
-    _cim = arcpy_cim
     def default(self, o: object) -> object:
-        return super().default(cim_to_cimple(o))
+        # Encode arcpy.cim objects as they are, nested objects are handed back
+        # to default by the encoder so every object is only visited once
+        info = REGISTRY.get(o.__class__.__name__)
+        if info is not None and info.cim_cls is o.__class__:
+            # Match cimple objects, which store Enum attributes by name
+            o_dict = {'type': o.__class__.__name__}
+            for k, v in o.__dict__.items():
+                o_dict[k] = v.name if isinstance(v, Enum) else v
+            return o_dict
+        return super().default(o)
+
+def decode_field(kind: str, value: object) -> object:
+    """Convert the JSON value of a typed field"""
+    match kind, value:
+        case 'datetime', str():
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                pass
+        
+        case 'nan' | 'inf', 'nan':
+            return None
+        
+        # Written by profiles that normalize nan and inf (see profiles.EncodingProfile)
+        case 'nan' | 'inf' | 'float', 'inf':
+            return math.inf
+        
+        case 'nan' | 'inf' | 'float', '-inf':
+            return -math.inf
+        
+        # Shapes, arcpy or JSON backed (see cimple.geometry)
+        case 'geometry', dict():
+            return as_shape(value)
+        
+        # Spatial References
+        case 'spatial_reference', {'wkid': _}:
+            return as_spatial_reference(value)
+        
+        # Untyped fields can still hold geometry or spatial references
+        case 'any', {'spatialReference': _} if 'type' not in value:
+            return as_shape(value)
+        
+        case 'any', {'wkid': _} if 'type' not in value:
+            return as_spatial_reference(value)
+        
+    return value
 
 # Decoders      
 class cimpleJSONDecoder(json.JSONDecoder):
-    _cim = cim
     def __init__(self, *args: object, **kwargs: object):
-        super().__init__(object_hook=self.hook, *args, **kwargs)
+        super().__init__(object_pairs_hook=self.pairs_hook, *args, **kwargs)
     
-    def hook(self, obj: object) -> object:
-        if isinstance(obj, dict):
-            _type = obj.pop('type', None)
-            
-            # CIM Objects
-            if cimple_obj := getattr(self._cim, str(_type), None):
-                return cimple_obj(**{k: self.hook(v) for k, v in obj.items()})
-            
-            # Shapes
-            elif 'spatialReference' in obj:
-                return AsShape(obj, esri_json=True)
-            
-            # Spatial References
-            elif 'wkid' in obj:
-                return SpatialReference(obj['wkid'])
-            
-        elif isinstance(obj, list):
-            return [self.hook(o) for o in obj]
+    def pairs_hook(self, pairs: list[tuple[str, object]]) -> object:
+        # Objects written by the encoders start with their type, so the class
+        # is known before any field and the fields become its __dict__ as is
+        if pairs and pairs[0][0] == 'type':
+            _type = pairs[0][1]
+            if _type.__class__ is str and (info := REGISTRY.get(_type)) is not None:  # type: ignore
+                attrs = dict(pairs)
+                del attrs['type']
+                for name, kind in info.decoded.items():
+                    if name in attrs:
+                        attrs[name] = decode_field(kind, attrs[name])
+                for name in info.floats:
+                    if attrs.get(name).__class__ is str:
+                        attrs[name] = decode_field('float', attrs[name])
+                return self.build(info, attrs)
+        return self.hook(dict(pairs))
+    
+    def hook(self, obj: dict[str, object]) -> object:
+        # object_hook is called bottom-up, so every object nested in obj has 
+        # already been decoded and only typed fields of obj are left to convert
+        _type = obj.get('type')
+        if _type.__class__ is not str or (info := REGISTRY.get(_type)) is None:  # type: ignore
+            return obj
+        del obj['type']
         
-        elif isinstance(obj, str):
-            if obj == 'nan':
-                return None
-            elif obj == 'inf':
-                return math.inf
-            try:
-                return datetime.fromisoformat(obj)
-            except Exception:
-                pass
-        return obj
-
+        # The registry knows which fields hold datetimes, geometries, etc. so
+        # every other value is used as is without inspecting it
+        for name, kind in info.decoded.items():
+            if name in obj:
+                obj[name] = decode_field(kind, obj[name])
+        for name in info.floats:
+            if obj.get(name).__class__ is str:
+                obj[name] = decode_field('float', obj[name])
+        return self.build(info, obj)
+    
+    def build(self, info: CIMClassInfo, attrs: dict[str, object]) -> object:
+        """Initialize a CIM object from its decoded attributes"""
+        return info.new(attrs)
+    
 class cimJSONDecoder(cimpleJSONDecoder):
-    _cim = arcpy_cim
-    def hook(self, obj: object) -> object:
-        return cimple_to_cim(super().hook(obj))
+    def build(self, info: CIMClassInfo, attrs: dict[str, object]) -> object:
+        # Nested values were already built as arcpy.cim objects by the hook, so 
+        # the document is converted in one pass without a cimple intermediary.
+        # CIM objects from the arcpy.cim module cannot be initialized with values
+        # We need to initialize the object then update the instance __dict__
+        cim_obj = info.cim_cls()
+        d = cim_obj.__dict__
+        # Sparse documents leave out fields at their cimple default
+        if len(attrs) < len(info.fields):
+            d.update(info.defaults)
+        d.update(attrs)
+        # In json geometry mode the fields hold JSON backed values, arcpy.cim needs arcpy objects
+        for name in info.decoded:
+            value = d.get(name)
+            if value.__class__ is JSONGeometry or value.__class__ is JSONSpatialReference:
+                d[name] = value.to_arcpy()  # type: ignore
+        return cim_obj
+
+# Generated codecs (cim._codecs) and converters (cim._converters) by class
+_BY_CLASS = {info.cls: info for info in REGISTRY.values()}
+
+def _to_json_shell(value: object, kind: str | None, schedule: Schedule) -> object:
+    """Convert a cimple value to a JSON ready value"""
+    if (info := _BY_CLASS.get(value.__class__)) is not None:
+        return info.to_dict(value, schedule)
+    if isinstance(value, list):
+        value = value.copy()
+        for i in range(len(value)):
+            schedule(value, i)
+    elif isinstance(value, dict):
+        value = value.copy()
+        for k in value:
+            schedule(value, k)
+    elif isinstance(value, datetime):
+        return value.isoformat()
+    elif (esri_json := to_json(value)) is not None:
+        # Copied like any other dict, profiles round coordinates in place
+        return _to_json_shell(esri_json, kind, schedule)
+    return value
+
+def _to_sparse_json_shell(value: object, kind: str | None, schedule: Schedule) -> object:
+    """Convert a cimple value to a JSON ready value without the fields at their default"""
+    if (info := _BY_CLASS.get(value.__class__)) is not None:
+        return info.to_sparse_dict(value, schedule)
+    return _to_json_shell(value, kind, schedule)
+
+def _json_shell(profile: EncodingProfile | None) -> Shell:
+    """The shell that builds JSON ready documents for a profile"""
+    if profile is not None and profile.elide_defaults:
+        return _to_sparse_json_shell
+    return _to_json_shell
+
+def _from_json_shell(value: object, kind: str | None, schedule: Schedule) -> object:
+    """Build a cimple value from a parsed JSON value"""
+    if kind is not None:
+        value = decode_field(kind, value)
+    # Parsed JSON is only referenced here, so it is converted in place
+    if value.__class__ is dict:
+        _type = value.get('type')  # type: ignore
+        if _type.__class__ is str and (info := REGISTRY.get(_type)) is not None:  # type: ignore
+            # from_dict keeps keys that aren't fields, the discriminator isn't one of them
+            del value['type']  # type: ignore
+            return info.from_dict(value, schedule)  # type: ignore
+        for k in value:  # type: ignore
+            schedule(value, k)
+    elif value.__class__ is list:
+        for i in range(len(value)):  # type: ignore
+            schedule(value, i)
+    return value
+
+def _to_cim_shell(value: object, kind: str | None, schedule: Schedule) -> object:
+    """Convert a cimple value to its arcpy.cim value"""
+    # Enums are not in the registry and are left as their string value
+    # The backend object creation will convert the string value to an int flag
+    if (info := REGISTRY.get(value.__class__.__name__)) is not None:
+        return info.to_cim(value, schedule, info.cim_cls)
+    if value.__class__ is JSONGeometry or value.__class__ is JSONSpatialReference:
+        return value.to_arcpy()  # type: ignore
+    if isinstance(value, list):
+        value = value.copy()
+        for i in range(len(value)):
+            schedule(value, i)
+    return value
+
+def _to_cimple_shell(value: object, kind: str | None, schedule: Schedule) -> object:
+    """Convert an arcpy.cim value to its cimple value"""
+    if (info := REGISTRY.get(value.__class__.__name__)) is not None:
+        return info.to_cimple(value, schedule)
+    if isinstance(value, list):
+        value = value.copy()
+        for i in range(len(value)):
+            schedule(value, i)
+    elif isinstance(value, Enum):
+        return value.name
+    return value
 
 # cimple <--> json
-def cimple_to_json(cimple_object: object, indent: int=4) -> str:
-    """Convert a CIM object into a JSON string"""
-    return json.dumps(cimple_object, indent=indent, cls=cimpleJSONEncoder)
+def cimple_to_json(cimple_object: object, indent: int=4, profile: str | EncodingProfile | None = None) -> str:
+    """Convert a CIM object into a JSON string, a profile (see `cimple.profiles`) replaces indent"""
+    if profile is None:
+        # The encoder writes objects as it reaches them, which is faster than
+        # building a JSON ready copy of the document first
+        return json.dumps(cimple_object, indent=indent, cls=cimpleJSONEncoder)
+    profile = get_profile(profile)
+    if not profile.rewrites and not profile.elide_defaults:
+        return profile.encoder(cimpleJSONEncoder).encode(cimple_object)
+    # Profiles that change values need the JSON ready document to rewrite
+    return profile.encoder(cimpleJSONEncoder).encode(profile.apply(traverse(cimple_object, _json_shell(profile))))
 
-def json_to_cimple(cimple_json: str) -> object:
-    """Convert a json string into an initialized CIM object"""    
-    return json.loads(cimple_json, cls=cimpleJSONDecoder)
+def json_to_cimple(cimple_json: str | bytes) -> object:
+    """Convert a json string into an initialized CIM object, parsed by the JSON backend (see `cimple.backends`)"""    
+    return traverse(backends.loads(cimple_json), _from_json_shell)
 
 # cimple <--> cim
-def cimple_to_cim(cimple_obj: object | list[object]) -> object:
-    if isinstance(cimple_obj, list):
-        return [cimple_to_cim(o) for o in cimple_obj]
-    cim_obj = getattr(arcpy_cim, cimple_obj.__class__.__name__, None)
-    
-    # Enums are in cim global namespace and shouldn't be initialized
-    # The backend object creation will convert the string value to an int flag
-    if cim_obj and not isinstance(cim_obj, EnumType):
-        # CIM objects from the arcpy.cim module cannot be initialized with values
-        # We need to initialize the object then update the instance __dict__
-        cim_obj = cim_obj()
-        cim_obj.__dict__.update({k: cimple_to_cim(v) for k, v in cimple_obj.__dict__.items()})
-        return cim_obj
-    return cimple_obj
+def cimple_to_cim(cimple_obj: object | list[object], memo: ConversionMemo | None = None) -> object:
+    """Convert a cimple object to arcpy.cim, pass a memo to convert shared objects once"""
+    return traverse(cimple_obj, _to_cim_shell, memo)
 
-def cim_to_cimple(cim_obj: object | list[object]) -> object:
-    if isinstance(cim_obj, list):
-        return [cim_to_cimple(o) for o in cim_obj]
-    cimple_obj = getattr(cim, cim_obj.__class__.__name__, None)
-    if cimple_obj:
-        return cimple_obj(**{k: cim_to_cimple(v) for k, v in cim_obj.__dict__.items()})
-    return cim_obj
+def cim_to_cimple(cim_obj: object | list[object], memo: ConversionMemo | None = None) -> object:
+    """Convert an arcpy.cim object to cimple, pass a memo to convert shared objects once"""
+    return traverse(cim_obj, _to_cimple_shell, memo)
 
 # cim <--> json
-def cim_to_json(cim_obj: object) -> str:
-    return json.dumps(cim_obj, cls=cimJSONEncoder)
+def cim_to_json(cim_obj: object, profile: str | EncodingProfile | None = None) -> str:
+    if profile is None:
+        return json.dumps(cim_obj, cls=cimJSONEncoder)
+    # Profiles rewrite JSON ready documents, which the cimple codecs build directly
+    return cimple_to_json(traverse(cim_obj, _to_cimple_shell), profile=profile)
 
 def json_to_cim(cim_json: str) -> object:
     return json.loads(cim_json, cls=cimJSONDecoder)
\ No newline at end of file
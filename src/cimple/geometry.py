@@ -0,0 +1,117 @@
+"""Geometry and spatial reference values without arcpy
+
+Geometry and spatial reference fields are decoded to arcpy objects when arcpy
+is installed. Without it (or with `set_geometry_mode('json')`) they are kept as
+`JSONGeometry` and `JSONSpatialReference`, which hold the esri JSON they were
+read from, so cimple documents can be read and written on machines without
+ArcGIS Pro. `cimple_to_cim` converts them to arcpy objects.
+
+Set `CIMPLE_GEOMETRY` to 'arcpy' or 'json' to pick a mode up front.
+"""
+import json
+import os
+from importlib.util import find_spec
+from typing import Any
+
+MODES = ('arcpy', 'json')
+
+
+class JSONSpatialReference:
+    """A spatial reference held as its esri JSON ({'wkid': 3857, ...})"""
+    __slots__ = ('json',)
+
+    def __init__(self, esri_json: dict[str, Any]) -> None:
+        self.json = esri_json
+
+    @property
+    def factoryCode(self) -> int | None:
+        return self.json.get('wkid')
+
+    def to_arcpy(self) -> Any:
+        from arcpy import SpatialReference
+        return SpatialReference(self.json['wkid'])
+
+    def __eq__(self, other: object) -> bool:
+        return other.__class__ is JSONSpatialReference and other.json == self.json  # type: ignore
+
+    def __repr__(self) -> str:
+        return f'JSONSpatialReference({self.json!r})'
+
+
+class JSONGeometry:
+    """A geometry held as its esri JSON ({'rings': [...], 'spatialReference': {...}})"""
+    __slots__ = ('json',)
+
+    def __init__(self, esri_json: dict[str, Any]) -> None:
+        self.json = esri_json
+
+    @property
+    def JSON(self) -> str:
+        """The esri JSON string, like arcpy.Geometry.JSON"""
+        return json.dumps(self.json)
+
+    @property
+    def spatialReference(self) -> JSONSpatialReference | None:
+        sr = self.json.get('spatialReference')
+        return None if sr is None else JSONSpatialReference(sr)
+
+    def to_arcpy(self) -> Any:
+        from arcpy import AsShape
+        return AsShape(self.json, esri_json=True)
+
+    def __eq__(self, other: object) -> bool:
+        return other.__class__ is JSONGeometry and other.json == self.json  # type: ignore
+
+    def __repr__(self) -> str:
+        return f'JSONGeometry({self.json!r})'
+
+
+def set_geometry_mode(mode: str | None = None) -> str:
+    """Decode geometries as arcpy objects or JSON values, None uses arcpy if it is installed
+
+    arcpy is found without importing it, it is imported by the first decoded geometry
+    """
+    global _mode
+    if mode is None:
+        mode = 'arcpy' if find_spec('arcpy') is not None else 'json'
+    elif mode not in MODES:
+        raise ValueError(f'Unknown geometry mode {mode!r}, expected one of {list(MODES)}')
+    _mode = mode
+    return mode
+
+
+def get_geometry_mode() -> str:
+    return _mode
+
+
+def as_shape(esri_json: dict[str, Any]) -> Any:
+    """Decode an esri JSON geometry"""
+    if _mode == 'json':
+        return JSONGeometry(esri_json)
+    from arcpy import AsShape
+    return AsShape(esri_json, esri_json=True)
+
+
+def as_spatial_reference(esri_json: dict[str, Any]) -> Any:
+    """Decode an esri JSON spatial reference, which has a wkid"""
+    if _mode == 'json':
+        return JSONSpatialReference(esri_json)
+    from arcpy import SpatialReference
+    return SpatialReference(esri_json['wkid'])
+
+
+def to_json(value: Any) -> Any:
+    """The esri JSON of an arcpy or JSON backed geometry or spatial reference, None for other values"""
+    cls = value.__class__
+    if cls is JSONGeometry or cls is JSONSpatialReference:
+        return value.json
+    # arcpy is already imported when it made the value, classes are matched by module
+    if cls.__module__.partition('.')[0] == 'arcpy':
+        if hasattr(value, 'JSON'):
+            return json.loads(value.JSON)
+        if hasattr(value, 'factoryCode'):
+            return {'wkid': value.factoryCode}
+    return None
+
+
+_mode: str = set_geometry_mode(os.environ.get('CIMPLE_GEOMETRY') or None)
@@ -0,0 +1,75 @@
+"""Decode many CIM documents across processes
+
+json_to_cimple is bound to one core by the GIL. `map_documents` decodes JSON
+documents in a pool of worker processes that each import cimple.cim once.
+Workers are sent JSON text or file paths, and when a function is given only
+its (small) result is sent back instead of the decoded object tree:
+
+    def layer_names(doc):
+        return [layer.name for layer in doc.layerDefinitions]
+
+    for names in map_documents(Path('layers').glob('*.lyrx'), layer_names):
+        ...
+
+Functions passed to map_documents must be importable by the workers, so they
+need to be defined at the top level of a module.
+"""
+from collections import deque
+from concurrent.futures import Future
+from itertools import islice
+from os import PathLike, process_cpu_count
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+# JSON text or the path of a JSON file (.lyrx, .mapx, etc.)
+Payload = str | PathLike[str]
+
+
+def _init_worker() -> None:
+    # Import (and check) the generated package once per worker process
+    from . import conversion as _
+
+
+def _decode_chunk(func: Callable[[Any], Any] | None, payloads: list[Payload]) -> list[Any]:
+    from .batch import Batch
+
+    texts = (
+        Path(payload).read_text(encoding='utf-8') if isinstance(payload, PathLike) else payload
+        for payload in payloads
+    )
+    documents = Batch().json_to_cimple(texts)
+    if func is None:
+        return list(documents)
+    return [func(document) for document in documents]
+
+
+def map_documents(
+    payloads: Iterable[Payload],
+    func: Callable[[Any], Any] | None = None,
+    workers: int | None = None,
+    chunksize: int = 32,
+    max_pending: int | None = None,
+) -> Iterator[Any]:
+    """Decode JSON documents in worker processes and yield `func(document)` in input order
+
+    payloads: JSON strings or paths (any os.PathLike, plain strings are always JSON)
+    func: Applied to each decoded document in the worker, the document itself is returned if None
+    workers: Number of worker processes (default: os.process_cpu_count())
+    chunksize: Documents sent to a worker per task
+    max_pending: Chunks submitted ahead of the consumer (default: 2 per worker),
+        bounds memory when payloads is a large or lazy iterable
+    """
+    # multiprocessing is only imported when a pool is started, it would be a third of `import cimple`
+    from concurrent.futures import ProcessPoolExecutor
+    
+    workers = workers or process_cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    payloads = iter(payloads)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending: deque[Future[list[Any]]] = deque()
+        while True:
+            while len(pending) < max_pending and (chunk := list(islice(payloads, chunksize))):
+                pending.append(pool.submit(_decode_chunk, func, chunk))
+            if not pending:
+                return
+            yield from pending.popleft().result()
@@ -0,0 +1,182 @@
+"""Encoding profiles for the JSON converters
+
+A profile controls how JSON is written by every JSON entry point
+(`cimple_to_json`, `cim_to_json`, `dump_cimple`, `dump_cim` and `Batch`):
+
+    cimple_to_json(symbol, profile='compact')
+
+The `compact` profile writes no whitespace, rounds floats by what they hold
+(coordinates, colors, sizes and other floats) and writes nan and inf the way
+the decoder reads them back (nan as null, inf as "inf" and -inf as "-inf"), so
+the JSON has no NaN or Infinity constants. Float fields decode the strings back
+to inf, untyped values (list items, dict values) keep them as strings.
+Rounded floats that are whole numbers are written as integers, the same way
+ArcGIS Pro writes them, unless they are too large to be exact (2**53 and up).
+
+The `sparse` profile writes no whitespace and leaves out every field that is
+still at its generated default, which the decoders fill back in. It doesn't
+change any values, so sparse documents decode to equal objects.
+"""
+import json
+import math
+import re
+from dataclasses import dataclass
+from functools import cache, cached_property
+from typing import Any
+
+from ._engine import Schedule, Shell, traverse
+from .cim._registry import REGISTRY
+
+# Float fields that hold symbol sizes (size, haloSize, width, height, etc.)
+_SIZE_FIELD = re.compile(r'(?:^|[a-z])(?:[Ss]ize|[Ww]idth|[Hh]eight)$')
+
+# Whole floats below this are written as ints, every int below it is an exact float
+_EXACT_INT = 2.0 ** 53
+
+# Keys that mark a plain dict as esri JSON geometry
+_GEOMETRY_KEYS = frozenset({'x', 'points', 'paths', 'rings', 'curvePaths', 'curveRings', 'xmin'})
+
+
+def _field_category(class_name: str, field: str, kind: str) -> str | None:
+    """The profile category of a field, None for fields a profile never changes"""
+    if field == 'values' and class_name.endswith('Color'):
+        return 'color'
+    if kind == 'geometry':
+        return 'coordinates'
+    if kind in ('nan', 'inf'):
+        return kind
+    if kind in ('float', 'int'):
+        return 'size' if _SIZE_FIELD.search(field) else 'float'
+    if kind in ('cim', 'list', 'dict', 'external', 'any'):
+        return 'any'
+    return None
+
+
+@cache
+def _categories() -> dict[str, dict[str, str]]:
+    """{type: {field: category}} for every field a profile may change, built on first use"""
+    return {
+        name: {
+            field: category
+            for field, kind in info.kinds.items()
+            if (category := _field_category(name, field, kind)) is not None
+        }
+        for name, info in REGISTRY.items()
+    }
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """How the JSON converters write documents
+
+    indent/separators: Passed to the json encoder
+    coordinates: Decimals kept for geometry coordinates
+    colors: Decimals kept for color values
+    sizes: Decimals kept for sizes, widths and heights
+    floats: Decimals kept for every other float
+    normalize_nonfinite: Write nan as null and inf as "inf" or "-inf"
+    elide_defaults: Leave out fields that are at their default (see `CIMClassInfo.defaults`)
+
+    Precisions left as None are written at full precision.
+    """
+    indent: int | None = 4
+    separators: tuple[str, str] | None = None
+    coordinates: int | None = None
+    colors: int | None = None
+    sizes: int | None = None
+    floats: int | None = None
+    normalize_nonfinite: bool = False
+    elide_defaults: bool = False
+
+    def encoder(self, cls: type[json.JSONEncoder]) -> json.JSONEncoder:
+        return cls(indent=self.indent, separators=self.separators)
+
+    @property
+    def rewrites(self) -> bool:
+        """If the profile changes any values"""
+        return self.normalize_nonfinite or any(
+            digits is not None for digits in (self.coordinates, self.colors, self.sizes, self.floats)
+        )
+
+    def apply(self, document: Any) -> Any:
+        """Apply the profile in place to a JSON ready document (see `conversion._to_json_shell`)"""
+        if not self.rewrites:
+            return document
+        return traverse(document, self._shell)
+
+    @cached_property
+    def _shell(self) -> Shell:
+        digits = {
+            'coordinates': self.coordinates,
+            'color': self.colors,
+            'size': self.sizes,
+            'float': self.floats,
+            'any': self.floats,
+        }
+        normalize = self.normalize_nonfinite
+        categories = _categories()
+
+        def shell(value: Any, kind: str | None, schedule: Schedule) -> Any:
+            cls = value.__class__
+            if cls is float:
+                if not math.isfinite(value):
+                    if not normalize:
+                        return value
+                    if value != value:
+                        return None
+                    return 'inf' if value > 0 else '-inf'
+                if (n := digits.get(kind)) is not None:  # type: ignore
+                    value = round(value, n)
+                    # Past 2**53 whole floats are written shorter (1e+300) than the int
+                    if value.is_integer() and -_EXACT_INT < value < _EXACT_INT:
+                        return int(value)
+                return value
+            if cls is list:
+                for i in range(len(value)):
+                    schedule(value, i, kind or 'any')
+            elif cls is dict:
+                if (fields := categories.get(value.get('type'))) is not None:  # type: ignore
+                    for field, category in fields.items():
+                        if field in value:
+                            schedule(value, field, category)
+                else:
+                    # Plain dicts are dictionaries or esri JSON geometries
+                    if kind != 'coordinates' and not _GEOMETRY_KEYS.isdisjoint(value):
+                        kind = 'coordinates'
+                    for key in value:
+                        schedule(value, key, kind or 'any')
+            return value
+
+        return shell
+
+
+PROFILES: dict[str, EncodingProfile] = {
+    # Matches the converters without a profile
+    'default': EncodingProfile(),
+    # For stored symbol libraries and network payloads
+    'compact': EncodingProfile(
+        indent=None,
+        separators=(',', ':'),
+        coordinates=6,
+        colors=2,
+        sizes=2,
+        floats=6,
+        normalize_nonfinite=True,
+    ),
+    # Lossless, for documents that are mostly defaults
+    'sparse': EncodingProfile(
+        indent=None,
+        separators=(',', ':'),
+        elide_defaults=True,
+    ),
+}
+
+
+def get_profile(profile: str | EncodingProfile) -> EncodingProfile:
+    """Get a profile by name, profile objects are returned as is"""
+    if isinstance(profile, EncodingProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f'Unknown encoding profile {profile!r}, expected one of {list(PROFILES)}') from None
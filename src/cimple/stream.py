@@ -0,0 +1,341 @@
+"""Stream large CIM documents to and from file objects
+
+json_to_cimple needs the whole document in memory before it can build any of
+it. `iter_cimple` and `iter_cim` read a file object in chunks and yield each
+entry of a top level array (`layerDefinitions` by default) as soon as it is
+parsed, so peak memory is bounded by the largest entry instead of the file:
+
+    with open('project.mapx', encoding='utf-8') as fp:
+        for layer in iter_cimple(fp):
+            ...
+
+`dump_cimple` and `dump_cim` are the writing side, they write the JSON of a
+document to a file object in buffered chunks without building the whole string.
+"""
+import codecs
+import io
+import json
+from typing import IO, Any, Callable, Iterable, Iterator
+
+from ._engine import traverse
+from .conversion import (
+    cimJSONDecoder,
+    cimJSONEncoder,
+    cimpleJSONDecoder,
+    cimpleJSONEncoder,
+    _json_shell,
+    _to_cimple_shell,
+)
+from .profiles import EncodingProfile, get_profile
+
+_WHITESPACE = ' \t\n\r'
+
+# Characters a JSON number can continue with
+_NUMBER = frozenset('0123456789+-.eE')
+
+
+class _Reader:
+    """Buffered JSON values from a text or binary file object"""
+
+    def __init__(self, fp: IO[str] | IO[bytes], chunk_size: int) -> None:
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        # utf-8-sig drops a byte order mark at the start of binary files
+        self._decode_bytes = codecs.getincrementaldecoder('utf-8-sig')().decode
+
+    def fill(self) -> bool:
+        """Read more of the file, at least doubling the unparsed buffer so retried parses stay linear"""
+        if self.eof:
+            return False
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.fp.read(max(self.chunk_size, len(self.buf)))
+        if not chunk:
+            self.eof = True
+            return False
+        if isinstance(chunk, bytes):
+            chunk = self._decode_bytes(chunk)
+        self.buf += chunk
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at the end of the file)"""
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if not c or c not in chars:
+            raise json.JSONDecodeError(f'Expecting one of {chars!r}', self.buf, self.pos)
+        self.pos += 1
+        return c
+
+    def value(self, decoder: json.JSONDecoder) -> Any:
+        """Parse the next value, reading until it is complete"""
+        c = self.peek()
+        if c == '-' or '0' <= c <= '9':
+            # raw_decode takes the start of a split number (1. or 3e) as a whole
+            # number, so numbers are read until the character after them
+            n = 0
+            while True:
+                buf, pos = self.buf, self.pos
+                while pos + n < len(buf) and buf[pos + n] in _NUMBER:
+                    n += 1
+                if pos + n < len(buf) or not self.fill():
+                    break
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_values(fp: IO[str] | IO[bytes], key: str | None, decoder: json.JSONDecoder, chunk_size: int) -> Iterator[Any]:
+    reader = _Reader(fp, chunk_size)
+    if key is not None:
+        # Skip (parse as plain JSON and drop) members of the top level object until key is found
+        plain = json.JSONDecoder()
+        reader.expect('{')
+        while True:
+            if reader.peek() == '}':
+                return
+            name = reader.value(plain)
+            reader.expect(':')
+            if name == key:
+                break
+            reader.value(plain)
+            if reader.expect(',}') == '}':
+                return
+        # A single object is yielded as is
+        if reader.peek() != '[':
+            yield reader.value(decoder)
+            return
+
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.value(decoder)
+        if reader.expect(',]') == ']':
+            return
+
+
+def iter_cimple(fp: IO[str] | IO[bytes], key: str | None = 'layerDefinitions', chunk_size: int = 1 << 16) -> Iterator[object]:
+    """Yield the cimple objects in the `key` array of a JSON document as they are read
+
+    fp: Text or binary (utf-8) file object
+    key: Top level member to stream, None streams a document that is itself an array
+    chunk_size: Characters read from fp at a time
+    """
+    # Entries are built as they are parsed, dispatching on the type written first
+    yield from _iter_values(fp, key, cimpleJSONDecoder(), chunk_size)
+
+
+def iter_cim(fp: IO[str] | IO[bytes], key: str | None = 'layerDefinitions', chunk_size: int = 1 << 16) -> Iterator[object]:
+    """Yield the arcpy.cim objects in the `key` array of a JSON document as they are read
+
+    See `iter_cimple`
+    """
+    yield from _iter_values(fp, key, cimJSONDecoder(), chunk_size)
+
+
+def _is_binary(fp: IO[str] | IO[bytes]) -> bool | None:
+    """If fp is written with bytes, None if that is only known from the first write"""
+    if isinstance(fp, io.TextIOBase):
+        return False
+    if isinstance(fp, (io.RawIOBase, io.BufferedIOBase)):
+        return True
+    # File-like wrappers (SpooledTemporaryFile, etc.) aren't io classes but have a mode
+    mode = getattr(fp, 'mode', None)
+    if isinstance(mode, str):
+        return 'b' in mode
+    return None
+
+
+def _write_chunks(chunks: Iterable[str], fp: IO[str] | IO[bytes], buffer_size: int) -> None:
+    """Join chunks into writes of about buffer_size characters, binary files get utf-8"""
+    binary = _is_binary(fp)
+
+    def write(text: str) -> None:
+        nonlocal binary
+        if binary is None:
+            # Binary files raise TypeError on text before writing any of it
+            try:
+                fp.write(text)  # type: ignore
+                binary = False
+                return
+            except TypeError:
+                binary = True
+        fp.write(text.encode('utf-8') if binary else text)  # type: ignore
+
+    buffer: list[str] = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            write(''.join(buffer))
+            buffer.clear()
+            size = 0
+    if buffer:
+        write(''.join(buffer))
+
+
+def _noop(*args: Any) -> None: ...
+
+
+def _same(value: Any) -> Any:
+    return value
+
+
+def _iter_json(
+    value: Any, 
+    encoder: json.JSONEncoder, 
+    shallow: Callable[[Any], Any], 
+    full: Callable[[Any], Any], 
+    depth: int, 
+    level: int = 0,
+) -> Iterator[str]:
+    """Yield the JSON of value in chunks, identical to encoder.encode(full(value))
+    
+    iterencode can't use the C encoder, so the outer `depth` levels of containers 
+    are written here and everything below them is encoded in one shot. Because
+    JSON strings can't hold a raw newline, a one shot encoding is indented to its 
+    level by replacing its newlines.
+    """
+    indent = encoder.indent
+    if isinstance(indent, int):
+        indent = ' ' * indent
+    if depth > 0:
+        value = shallow(value)
+    if depth <= 0 or not isinstance(value, (dict, list)) or not value:
+        text = encoder.encode(full(value))
+        if indent is not None and level:
+            text = text.replace('\n', '\n' + indent * level)
+        yield text
+        return
+    
+    if indent is None:
+        first, item, last = '', encoder.item_separator, ''
+    else:
+        first = '\n' + indent * (level + 1)
+        item = encoder.item_separator + first
+        last = '\n' + indent * level
+    if isinstance(value, dict):
+        key_separator = encoder.key_separator
+        yield '{'
+        i = 0
+        for k, v in value.items():
+            if k.__class__ is not str:
+                k = _json_key(k, encoder)
+                if k is None:
+                    continue
+            yield (item if i else first) + encoder.encode(k) + key_separator
+            yield from _iter_json(v, encoder, shallow, full, depth - 1, level + 1)
+            i += 1
+        yield last + '}'
+    else:
+        yield '['
+        for i, v in enumerate(value):
+            yield item if i else first
+            yield from _iter_json(v, encoder, shallow, full, depth - 1, level + 1)
+        yield last + ']'
+
+
+def _json_key(key: Any, encoder: json.JSONEncoder) -> str | None:
+    """Convert a dict key to a string like json.dumps does, None when it is skipped"""
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, (int, float)):
+        # The JSON literal, 1.5 -> '1.5', True -> 'true', None -> 'null'
+        return encoder.encode(key)
+    if encoder.skipkeys:
+        return None
+    raise TypeError(f'keys must be str, int, float, bool or None, not {key.__class__.__name__}')
+
+
+def _json_native(value: Any) -> bool:
+    return isinstance(value, (dict, list, str, int, float, bool, type(None)))
+
+
+def dump_cimple(
+    cimple_obj: object, 
+    fp: IO[str] | IO[bytes], 
+    indent: int | None = 4, 
+    buffer_size: int = 1 << 16, 
+    depth: int = 2,
+    profile: str | EncodingProfile | None = None,
+) -> None:
+    """Write a cimple object as JSON to a text or binary file object
+
+    Writes the same JSON as `cimple_to_json` in chunks of about buffer_size characters.
+    Values more than `depth` containers deep are converted and encoded whole, so 
+    memory is bounded by the largest of them (each layer of a layer or map document
+    with the default depth).
+    """
+    if profile is None:
+        encoder = cimpleJSONEncoder(indent=indent)
+    else:
+        profile = get_profile(profile)
+        encoder = profile.encoder(cimpleJSONEncoder)
+    shell = _json_shell(profile)
+    if profile is not None and profile.rewrites:
+        # Values are rewritten by the field that holds them, so the whole
+        # document is converted up front and only the text is streamed
+        cimple_obj = profile.apply(traverse(cimple_obj, shell))
+    _write_chunks(
+        _iter_json(
+            cimple_obj, 
+            encoder, 
+            shallow=lambda value: shell(value, None, _noop),
+            # Without a profile that changes values the encoder writes cimple objects itself
+            full=(lambda value: traverse(value, shell)) if profile is not None and profile.elide_defaults else _same,
+            depth=depth,
+        ), 
+        fp, 
+        buffer_size,
+    )
+
+
+def dump_cim(
+    cim_obj: object, 
+    fp: IO[str] | IO[bytes], 
+    indent: int | None = None, 
+    buffer_size: int = 1 << 16, 
+    depth: int = 2,
+    profile: str | EncodingProfile | None = None,
+) -> None:
+    """Write an arcpy.cim object as JSON to a text or binary file object
+
+    Writes the same JSON as `cim_to_json`, see `dump_cimple`
+    """
+    if profile is not None:
+        dump_cimple(traverse(cim_obj, _to_cimple_shell), fp, buffer_size=buffer_size, depth=depth, profile=profile)
+        return
+    encoder = cimJSONEncoder(indent=indent)
+    _write_chunks(
+        _iter_json(
+            cim_obj, 
+            encoder, 
+            shallow=lambda value: value if _json_native(value) else encoder.default(value),
+            full=lambda value: value,
+            depth=depth,
+        ), 
+        fp, 
+        buffer_size,
+    )
@@ -0,0 +1,13 @@
+import sys
+from pathlib import Path
+
+# Use the arcpy stand-in in tests/stubs when ArcGIS Pro is not available
+# so cimple can be built and the conversions exercised on any platform
+try:
+    import arcpy  # noqa: F401
+except ImportError:
+    sys.path.append(str(Path(r'C:\Program Files\ArcGIS\Pro\Resources\ArcPy')))
+    try:
+        import arcpy  # noqa: F401
+    except ImportError:
+        sys.path.append(str(Path(__file__).parent / 'stubs'))
@@ -0,0 +1,21 @@
+"""Minimal stand-in for ``arcpy`` so cimple can be built and tested without ArcGIS Pro
+
+Only the surface cimple touches is provided: ``arcpy.cim``, ``arcpy.version``,
+``AsShape``, and the geometry/spatial reference types referenced by CIM defaults.
+"""
+from types import SimpleNamespace
+
+from . import cim as cim
+from .arcobjects import (
+    AsShape as AsShape,
+    Extent as Extent,
+    Geometry as Geometry,
+    Multipoint as Multipoint,
+    Point as Point,
+    Polygon as Polygon,
+    Polyline as Polyline,
+    SpatialReference as SpatialReference,
+)
+
+# Stand-in builds always compare older than a real ArcGIS Pro install
+version = SimpleNamespace(data={'version': '0.0'}, build='0')
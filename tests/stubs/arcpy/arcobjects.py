@@ -0,0 +1,44 @@
+import json as _json
+
+
+class SpatialReference:
+    def __init__(self, wkid: int | None = None):
+        self.factoryCode = wkid
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, SpatialReference) and other.factoryCode == self.factoryCode
+
+
+class Geometry:
+    def __init__(self, esri_json: dict[str, object]):
+        self._json = esri_json
+        sr = esri_json.get('spatialReference') or {}
+        self.spatialReference = SpatialReference(sr.get('wkid'))  # type: ignore
+
+    @property
+    def JSON(self) -> str:
+        return _json.dumps(self._json)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Geometry) and other._json == self._json
+
+
+class Point(Geometry): ...
+class Multipoint(Geometry): ...
+class Polyline(Geometry): ...
+class Polygon(Geometry): ...
+class Extent(Geometry): ...
+
+
+def AsShape(geojson_struct: dict[str, object], esri_json: bool = False) -> Geometry:
+    if 'rings' in geojson_struct:
+        return Polygon(geojson_struct)
+    if 'paths' in geojson_struct:
+        return Polyline(geojson_struct)
+    if 'points' in geojson_struct:
+        return Multipoint(geojson_struct)
+    if 'xmin' in geojson_struct:
+        return Extent(geojson_struct)
+    if 'x' in geojson_struct:
+        return Point(geojson_struct)
+    return Geometry(geojson_struct)
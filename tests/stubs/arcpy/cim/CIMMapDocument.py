@@ -0,0 +1,55 @@
+import enum as _enum
+from datetime import datetime as _datetime
+
+from ..arcobjects import SpatialReference as _SpatialReference
+
+__all__ = [
+    'MapType',
+    'CIMMap',
+    'CIMMapDocument',
+    'CIMLayerDocument',
+]
+
+
+class MapType(_enum.Enum):
+    """Map type."""
+    Map = 0
+    Scene = 1
+    BasemapLayer = 2
+
+
+class CIMMap:
+    """Represents a map."""
+    def __init__(self):
+        self.name = ''
+        self.uRI = ''
+        self.mapType = MapType.Map
+        self.layers = []
+        self.standaloneTables = []
+        self.spatialReference = _SpatialReference
+        self.referenceScale = 0.0
+        self.defaultViewingMode = 0
+        self.elevationSurfaces = []
+        self.useServiceLayerIDs = False
+        self.dateExported = _datetime.now()
+        self.timeDimension = float('nan')
+
+
+class CIMMapDocument:
+    """Represents a map document."""
+    def __init__(self):
+        self.version = ''
+        self.build = 0
+        self.mapDefinition = 'CIMMap'
+        self.layerDefinitions = []
+        self.binaryReferences = []
+
+
+class CIMLayerDocument:
+    """Represents a layer document."""
+    def __init__(self):
+        self.version = ''
+        self.build = 0
+        self.layers = []
+        self.layerDefinitions = []
+        self.binaryReferences = []
@@ -0,0 +1,33 @@
+__all__ = [
+    'CIMSimpleRenderer',
+    'CIMUniqueValueClass',
+    'CIMUniqueValueRenderer',
+]
+
+
+class CIMSimpleRenderer:
+    """Represents a simple renderer."""
+    def __init__(self):
+        self.label = ''
+        self.description = ''
+        self.symbol = 'CIMSymbolReference'
+        self.visualVariables = []
+
+
+class CIMUniqueValueClass:
+    """Represents a unique value class."""
+    def __init__(self):
+        self.label = ''
+        self.symbol = 'CIMSymbolReference'
+        self.values = []
+        self.visible = True
+
+
+class CIMUniqueValueRenderer:
+    """Represents a unique value renderer."""
+    def __init__(self):
+        self.fields = []
+        self.groups = []
+        self.defaultSymbol = 'CIMSymbolReference'
+        self.useDefaultSymbol = False
+        self.defaultLabel = ''
@@ -0,0 +1,74 @@
+import enum as _enum
+
+__all__ = [
+    'LineCapStyle',
+    'CIMRGBColor',
+    'CIMSolidFill',
+    'CIMSolidStroke',
+    'CIMVectorMarker',
+    'CIMPointSymbol',
+    'CIMPolygonSymbol',
+    'CIMSymbolReference',
+]
+
+
+class LineCapStyle(_enum.Enum):
+    """Line cap style."""
+    Butt = 0
+    Round = 1
+    Square = 2
+
+
+class CIMRGBColor:
+    """Represents an RGB color."""
+    def __init__(self):
+        self.values = []
+        self.alpha = 100.0
+
+
+class CIMSolidFill:
+    """Represents a solid fill symbol layer."""
+    def __init__(self):
+        self.enable = True
+        self.color = 'CIMRGBColor'
+
+
+class CIMSolidStroke:
+    """Represents a solid stroke symbol layer."""
+    def __init__(self):
+        self.enable = True
+        self.capStyle = LineCapStyle.Round
+        self.width = 1.0
+        self.color = 'CIMRGBColor'
+
+
+class CIMVectorMarker:
+    """Represents a vector marker symbol layer."""
+    def __init__(self):
+        self.enable = True
+        self.size = 6.0
+        self.rotation = 0.0
+        self.markerGraphics = []
+
+
+class CIMPointSymbol:
+    """Represents a point symbol."""
+    def __init__(self):
+        self.symbolLayers = []
+        self.haloSize = 1.0
+        self.angle = 0.0
+
+
+class CIMPolygonSymbol:
+    """Represents a polygon symbol."""
+    def __init__(self):
+        self.symbolLayers = []
+
+
+class CIMSymbolReference:
+    """Represents a symbol reference."""
+    def __init__(self):
+        self.symbol = 'CIMPointSymbol'
+        self.symbolName = ''
+        self.minScale = 0.0
+        self.maxScale = float('inf')
@@ -0,0 +1,62 @@
+import enum as _enum
+
+from ..arcobjects import Extent as _Extent
+
+__all__ = [
+    'LayerType',
+    'CIMDataConnection',
+    'CIMFeatureTable',
+    'CIMFeatureLayer',
+    'CIMGroupLayer',
+]
+
+
+class LayerType(_enum.Enum):
+    """Layer type."""
+    Operational = 0
+    BasemapBackground = 1
+    BasemapTopReference = 2
+
+
+class CIMDataConnection:
+    """Represents a data connection."""
+    def __init__(self):
+        self.workspaceConnectionString = ''
+        self.dataset = ''
+        self.datasetType = 0
+
+
+class CIMFeatureTable:
+    """Represents a feature table."""
+    def __init__(self):
+        self.displayField = ''
+        self.dataConnection = 'CIMDataConnection'
+        self.definitionExpression = ''
+
+
+class CIMFeatureLayer:
+    """Represents a feature layer."""
+    def __init__(self):
+        self.name = ''
+        self.uRI = ''
+        self.layerType = LayerType.Operational
+        self.visibility = True
+        self.expanded = False
+        self.minScale = 0.0
+        self.maxScale = 0.0
+        self.transparency = 0.0
+        self.featureTable = 'CIMFeatureTable'
+        self.renderer = 'CIMSimpleRenderer'
+        self.labelClasses = []
+        self.extent = _Extent
+        self.customProperties = object()
+
+
+class CIMGroupLayer:
+    """Represents a group layer."""
+    def __init__(self):
+        self.name = ''
+        self.uRI = ''
+        self.layerType = LayerType.Operational
+        self.visibility = True
+        self.layers = []
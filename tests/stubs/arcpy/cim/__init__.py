@@ -0,0 +1,10 @@
+from . import (
+    CIMSymbols as CIMSymbols,
+    CIMRenderers as CIMRenderers,
+    CIMVectorLayers as CIMVectorLayers,
+    CIMMapDocument as CIMMapDocument,
+)
+from .CIMSymbols import *
+from .CIMRenderers import *
+from .CIMVectorLayers import *
+from .CIMMapDocument import *
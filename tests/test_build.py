@@ -0,0 +1,180 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import MISSING, fields
+from pathlib import Path
+
+import arcpy
+from arcpy import cim as arcpy_cim
+
+import cimple
+from cimple import _build, cim
+from cimple.cim._registry import REGISTRY
+
+def _python_path(*paths: Path) -> dict[str, str]:
+    """The environment with paths as PYTHONPATH"""
+    return {**os.environ, 'PYTHONPATH': os.pathsep.join(str(path) for path in paths)}
+
+def _run_python(code: str, *paths: Path) -> subprocess.CompletedProcess[str]:
+    """Run code in a new interpreter that imports from paths"""
+    return subprocess.run([sys.executable, '-c', code], env=_python_path(*paths), capture_output=True, text=True)
+
+# Directories that cimple and arcpy are imported from
+_PATHS = tuple(Path(m.__file__).parents[1] for m in (cimple, arcpy))  # type: ignore
+
+def test_registry_matches_dataclasses():
+    for name, info in REGISTRY.items():
+        assert getattr(cim, name) is info.cls
+        dc_fields = {f.name: f for f in fields(info.cls)}
+        assert info.fields == tuple(dc_fields)
+        for f_name, default in info.defaults.items():
+            assert dc_fields[f_name].default == default, f'{name}.{f_name}'
+        for f_name in set(dc_fields) - set(info.defaults):
+            assert dc_fields[f_name].default_factory is not MISSING, f'{name}.{f_name}'
+        assert set(info.children) <= set(info.fields)
+
+def test_registry_resolves_arcpy_classes():
+    for name, info in REGISTRY.items():
+        assert info.cim_cls is getattr(arcpy_cim, name)
+
+def test_import_without_arcpy():
+    # The built package is validated from its stamp, arcpy is only imported when used
+    stamp = Path(cimple.__file__).parent / 'cim' / '_stamp.json'
+    code = (
+        'import sys, cimple\n'
+        'assert "arcpy" not in sys.modules\n'
+        f'assert cimple.__arcpy_version__ == tuple(__import__("json").load(open({str(stamp)!r}))["arcpy"])\n'
+        'assert "arcpy" in sys.modules\n'
+    )
+    result = _run_python(code, *_PATHS)
+    assert result.returncode == 0, result.stderr
+    # Nothing was rebuilt
+    assert not result.stdout
+
+def test_stamp():
+    stamp = _build.read_stamp()
+    assert stamp is not None
+    assert tuple(stamp['cimple']) == _build.__version__
+    # Every generated module is hashed
+    package = Path(cimple.__file__).parent
+    assert stamp['modules'] == {
+        path.name: _build.source_hash(path.read_text(encoding='utf-8')) for path in (package / 'cim').glob('*.py')
+    }
+    assert stamp['schema'] == _build.schema_hash(stamp['modules'])
+    assert stamp['generator'] == _build.generator_hash()
+    # Every cimple module the generated code imports is hashed with the generator
+    imported = {
+        line.split()[1][2:] + '.py'
+        for path in (package / 'cim').glob('*.py')
+        for line in path.read_text(encoding='utf-8').splitlines() if line.startswith('from ..')
+    }
+    assert imported and imported <= set(_build.GENERATOR_INPUTS)
+
+    # Validating a built package doesn't import any of it
+    code = (
+        'import sys, types\n'
+        'package = types.ModuleType("cimple")\n'
+        f'package.__path__ = [{str(package)!r}]\n'
+        'sys.modules["cimple"] = package\n'
+        'from cimple._build import check_cimple\n'
+        f'check_cimple({str(package / "__init__.py")!r})\n'
+        'assert not [m for m in sys.modules if m.startswith("cimple.cim")]\n'
+    )
+    result = _run_python(code, package.parent)
+    assert result.returncode == 0, result.stderr
+    assert not result.stdout
+
+def test_relocated_build(tmp_path):
+    # A built package copied to another environment is used without arcpy
+    package = tmp_path / 'cimple'
+    shutil.copytree(Path(cimple.__file__).parent, package, ignore=shutil.ignore_patterns('__pycache__', '.cim*'))
+    code = (
+        'import sys\n'
+        'sys.modules["arcpy"] = None\n'
+        'import cimple\n'
+        f'assert cimple.__file__.startswith({str(package)!r})\n'
+        'assert cimple.json_to_cimple(cimple.cimple_to_json(cimple.cim.CIMRGBColor())) == cimple.cim.CIMRGBColor()\n'
+    )
+    result = _run_python(code, tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert not result.stdout and not result.stderr
+    
+    # A stale build that can't be rebuilt without arcpy is kept with a warning
+    with open(package / '_build.py', 'a', encoding='utf-8') as f:
+        f.write('\n# edited\n')
+    result = _run_python(code, tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert 'using the existing build' in result.stderr
+
+def test_concurrent_build():
+    # Processes that find a stale build at the same time build it once
+    _build.STAMP.unlink()
+    code = 'from cimple import cim, cimple_to_json\ncimple_to_json(cim.CIMLayerDocument())\n'
+    processes = [
+        subprocess.Popen(
+            [sys.executable, '-c', code], 
+            env=_python_path(*_PATHS), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        )
+        for _ in range(4)
+    ]
+    outputs = [p.communicate() for p in processes]
+    assert all(p.returncode == 0 for p in processes), [err for _, err in outputs]
+    assert sum(out.count('Building cimple.cim') for out, _ in outputs) == 1
+    assert _build.check_stamp(_build.read_stamp()) is None
+    # Only the published build is left
+    target = _build.MOD_ROOT / 'cim'
+    current = [os.readlink(target)] if target.is_symlink() else []
+    assert [path.name for path in _build.MOD_ROOT.glob('.cim-*')] == current
+
+def test_publish():
+    target = _build.MOD_ROOT / 'cim'
+    # A rebuild replaces the link to the build in one step, cim is never missing
+    missing: list[bool] = []
+    done = threading.Event()
+    def watch() -> None:
+        while not done.is_set():
+            if not (target / '__init__.py').exists():
+                missing.append(True)
+            # Yield to the build between checks
+            time.sleep(0)
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    try:
+        for _ in range(3):
+            _build.STAMP.unlink()
+            _build.build_cim()
+    finally:
+        done.set()
+        watcher.join()
+    assert not missing
+    if os.name != 'nt':
+        assert target.is_symlink()
+        assert [path.name for path in _build.MOD_ROOT.glob('.cim-*')] == [os.readlink(target)]
+    assert _build.check_stamp(_build.read_stamp()) is None
+
+def test_incremental_build():
+    target = _build.MOD_ROOT / 'cim'
+    mtimes = {path.name: path.stat().st_mtime_ns for path in target.glob('*.py')}
+    stamp = _build.read_stamp()
+    assert stamp is not None
+    
+    # Generating is deterministic, a rebuild of the same arcpy writes no modules
+    assert _build.generate_cim() == _build.generate_cim()
+    _build.build_cim()
+    assert {path.name: path.stat().st_mtime_ns for path in target.glob('*.py')} == mtimes
+    assert _build.read_stamp()['modules'] == stamp['modules']  # type: ignore
+    
+    # Only changed modules are written, the rest keep their files
+    literals = target / 'literals.py'
+    source = literals.read_text(encoding='utf-8')
+    literals.write_text(source + '\n# edited\n', encoding='utf-8')
+    stamp['modules']['literals.py'] = _build.source_hash(literals.read_text(encoding='utf-8'))
+    _build.write_stamp(target, stamp['modules'])
+    _build.build_cim()
+    assert literals.read_text(encoding='utf-8') == source
+    changed = {name for name, mtime in mtimes.items() if (target / name).stat().st_mtime_ns != mtime}
+    assert changed == {'literals.py'}
+    assert _build.check_stamp(_build.read_stamp()) is None
@@ -1,5 +1,6 @@
 import datetime
 from enum import Enum
+import json
 import sys
 from pathlib import Path
 
@@ -21,8 +22,26 @@ from cimple import (
     cimple_to_cim,
     cim_to_json,
     json_to_cim,
+    ConversionMemo,
+    Batch,
+    map_documents,
+    iter_cimple,
+    iter_cim,
+    dump_cimple,
+    dump_cim,
+    EncodingProfile,
+    cimple_to_bytes,
+    bytes_to_cimple,
+    open_view,
+    set_backend,
+    get_backend,
+    JSONGeometry,
+    JSONSpatialReference,
+    set_geometry_mode,
+    get_geometry_mode,
 )
 from cimple import cim
+from cimple.conversion import cimpleJSONDecoder, cimpleJSONEncoder
 
 def get_cim_objs(): # type: ignore
     yield from filter(
@@ -142,7 +161,735 @@ def test_cim_roundtrip():
     else:
         print('\t'f'cimple <--> cim {errors} errors')
 
+def test_json_to_cim_direct():
+    doc = {
+        'type': 'CIMFeatureLayer',
+        'name': 'Hydrants',
+        'renderer': {
+            'type': 'CIMSimpleRenderer',
+            'symbol': {
+                'type': 'CIMSymbolReference',
+                'symbol': {
+                    'type': 'CIMPointSymbol',
+                    'symbolLayers': [
+                        {'type': 'CIMVectorMarker', 'size': 4.0},
+                        {'type': 'CIMSolidFill', 'color': {'type': 'CIMRGBColor', 'values': [255, 0, 0, 100]}},
+                    ],
+                },
+            },
+        },
+    }
+    layer = json_to_cim(json.dumps(doc))
+    assert type(layer) is arcpy.cim.CIMFeatureLayer
+    assert layer.name == 'Hydrants'
+    
+    # Nested objects are built as arcpy.cim objects directly
+    symbol = layer.renderer.symbol.symbol
+    assert type(symbol) is arcpy.cim.CIMPointSymbol
+    marker, fill = symbol.symbolLayers
+    assert type(marker) is arcpy.cim.CIMVectorMarker and marker.size == 4.0
+    assert type(fill.color) is arcpy.cim.CIMRGBColor and fill.color.values == [255, 0, 0, 100]
+    
+    # Attributes not in the document keep their arcpy.cim defaults
+    assert layer.visibility is True
+
+def test_json_to_cim_skips_cimple():
+    from cimple import conversion
+    
+    def fail(*args: object) -> object:
+        raise AssertionError('json_to_cim should not convert through cimple')
+    
+    _cimple_to_cim = conversion.cimple_to_cim
+    conversion.cimple_to_cim = fail
+    try:
+        layer = json_to_cim(json.dumps({'type': 'CIMGroupLayer', 'layers': [{'type': 'CIMGroupLayer'}]}))
+    finally:
+        conversion.cimple_to_cim = _cimple_to_cim
+    assert type(layer.layers[0]) is arcpy.cim.CIMGroupLayer
+
+def test_cim_to_json_direct():
+    cim_obj = json_to_cim(json.dumps({
+        'type': 'CIMSimpleRenderer',
+        'label': 'Lines',
+        'symbol': {
+            'type': 'CIMSymbolReference',
+            'symbol': {
+                'type': 'CIMPolygonSymbol',
+                'symbolLayers': [
+                    {'type': 'CIMSolidStroke', 'width': 2.5},
+                    {'type': 'CIMSolidFill', 'color': {'type': 'CIMRGBColor', 'values': [0, 0, 255, 50]}},
+                ],
+            },
+        },
+    }))
+    # Output must match the JSON of the equivalent cimple object
+    expected = json.dumps(cim_to_cimple(cim_obj), cls=cimpleJSONEncoder)
+    assert cim_to_json(cim_obj) == expected
+    assert json.loads(expected)['symbol']['symbol']['symbolLayers'][0]['capStyle'] == 'Round'
+
+def test_typed_decoding():
+    cim_map = json_to_cimple(json.dumps({
+        'type': 'CIMMap',
+        'name': '2024-01-01',
+        'uRI': 'nan',
+        'dateExported': '2024-05-06T07:08:09',
+        'spatialReference': {'wkid': 3857},
+        'timeDimension': 'nan',
+    }))
+    assert isinstance(cim_map, cim.CIMMap)
+    
+    # Only fields typed as datetime are parsed
+    assert cim_map.dateExported == datetime.datetime(2024, 5, 6, 7, 8, 9)
+    assert cim_map.name == '2024-01-01'
+    assert cim_map.uRI == 'nan'
+    assert cim_map.timeDimension is None
+    assert isinstance(cim_map.spatialReference, arcpy.SpatialReference)
+    
+    layer = json_to_cimple(json.dumps({
+        'type': 'CIMFeatureLayer',
+        'extent': {'xmin': 0, 'ymin': 0, 'xmax': 1, 'ymax': 1, 'spatialReference': {'wkid': 4326}},
+        'labelClasses': [{'wkid': 4326}],
+    }))
+    assert isinstance(layer.extent, arcpy.Geometry)
+    
+    # Only untyped and geometry fields are checked for spatial references
+    assert layer.labelClasses == [{'wkid': 4326}]
+
+def test_codecs_match_generic():
+    layer = cim.CIMFeatureLayer(
+        name='Parcels',
+        renderer=cim.CIMSimpleRenderer(
+            symbol=cim.CIMSymbolReference(
+                symbol=cim.CIMPolygonSymbol(symbolLayers=[cim.CIMSolidStroke(), cim.CIMSolidFill()]),
+            ),
+        ),
+    )
+    doc = cim.CIMLayerDocument(layerDefinitions=[layer, cim.CIMGroupLayer(layers=['CIMPATH=parcels.json'])])
+    doc_json = cimple_to_json(doc)
+    assert doc_json == json.dumps(doc, indent=4, cls=cimpleJSONEncoder)
+    assert json_to_cimple(doc_json) == json.loads(doc_json, cls=cimpleJSONDecoder) == doc
+
+def test_codecs_fill_defaults():
+    layer = json_to_cimple('{"type": "CIMFeatureLayer", "name": "Parcels"}')
+    assert layer == cim.CIMFeatureLayer(name='Parcels')
+    # default factories are called per object
+    assert layer.labelClasses is not json_to_cimple('{"type": "CIMFeatureLayer"}').labelClasses
+
+def test_codecs_keep_unknown_fields():
+    # Fields added by newer ArcGIS Pro versions survive a round trip
+    text = '{"type": "CIMRGBColor", "values": [1], "alpha": 50, "newField": 7, "newChild": {"type": "CIMRGBColor"}}'
+    for color in (json_to_cimple(text), cimpleJSONDecoder().decode(text), bytes_to_cimple(cimple_to_bytes(json_to_cimple(text)))):
+        assert color.newField == 7 and color.newChild == cim.CIMRGBColor()  # type: ignore
+        for profile in (None, 'sparse'):
+            written = json.loads(cimple_to_json(color, profile=profile))  # type: ignore
+            assert written['newField'] == 7 and written['newChild']['type'] == 'CIMRGBColor'
+    assert cim_to_cimple(cimple_to_cim(color)) == color
+
+def test_converters():
+    stroke = arcpy.cim.CIMSolidStroke()
+    assert isinstance(stroke.capStyle, Enum)
+    
+    # arcpy.cim Enums are stored by name in cimple
+    cimple_stroke = cim_to_cimple(stroke)
+    assert isinstance(cimple_stroke, cim.CIMSolidStroke)
+    assert cimple_stroke.capStyle == 'Round'
+    
+    symbol = cim.CIMPolygonSymbol(symbolLayers=[cim.CIMSolidStroke(width=3.0), cim.CIMSolidFill()])
+    cim_symbol = cimple_to_cim(symbol)
+    assert type(cim_symbol) is arcpy.cim.CIMPolygonSymbol
+    assert [type(l) for l in cim_symbol.symbolLayers] == [arcpy.cim.CIMSolidStroke, arcpy.cim.CIMSolidFill]
+    assert cim_symbol.symbolLayers[0].width == 3.0
+    assert cim_to_cimple(cim_symbol) == symbol
+
+def test_deep_nesting():
+    # Deeper than the recursion limit, but within the depth json can parse
+    depth = sys.getrecursionlimit() * 2
+    deep = cim.CIMGroupLayer(name='leaf')
+    for _ in range(depth):
+        deep = cim.CIMGroupLayer(layers=[deep])
+    
+    for converted in (
+        cim_to_cimple(cimple_to_cim(deep)), 
+        json_to_cimple(cimple_to_json(deep, indent=None)),  # type: ignore
+    ):
+        levels = 0
+        while converted.layers:
+            converted = converted.layers[0]
+            levels += 1
+        assert levels == depth and converted.name == 'leaf'
+
+def test_conversion_memo():
+    color = cim.CIMRGBColor(values=[0, 0, 0, 100])
+    fills = [cim.CIMSolidFill(color=color) for _ in range(3)]
+    symbol = cim.CIMPolygonSymbol(symbolLayers=[*fills, fills[0]])
+    
+    # Without a memo every reference is converted to its own copy
+    cim_symbol = cimple_to_cim(symbol)
+    assert cim_symbol.symbolLayers[0] is not cim_symbol.symbolLayers[3]
+    
+    memo = ConversionMemo()
+    cim_symbol = cimple_to_cim(symbol, memo=memo)
+    layers = cim_symbol.symbolLayers
+    assert layers[0] is layers[3]
+    assert layers[0].color is layers[1].color is layers[2].color
+    # fills[0] is reused once and color twice
+    assert memo.saved == 3
+    assert cim_to_cimple(cim_symbol, memo=ConversionMemo()).symbolLayers[3] is not None
+
+def test_conversion_memo_cycles():
+    group = cim.CIMGroupLayer(name='loop')
+    group.layers = [group]
+    
+    cim_group = cimple_to_cim(group, memo=ConversionMemo())
+    assert cim_group.layers[0] is cim_group
+    
+    memo = ConversionMemo()
+    cimple_group = cim_to_cimple(cim_group, memo=memo)
+    assert cimple_group.layers[0] is cimple_group and cimple_group.name == 'loop'
+    assert memo.saved == 1
+
+def test_batch():
+    documents = [
+        cim.CIMLayerDocument(layerDefinitions=[cim.CIMFeatureLayer(name=f'Layer {i}')]) 
+        for i in range(5)
+    ]
+    batch = Batch()
+    
+    texts = list(batch.cimple_to_json(documents))
+    assert texts == [cimple_to_json(doc) for doc in documents]
+    assert batch.stats.documents == 5 and batch.stats.chars == sum(map(len, texts))
+    
+    # Results are yielded lazily
+    decoded = batch.json_to_cimple(iter(texts))
+    assert next(decoded) == documents[0]
+    assert batch.stats.documents == 1
+    assert list(decoded) == documents[1:]
+    
+    cim_docs = list(batch.cimple_to_cim(documents))
+    assert list(batch.cim_to_json(cim_docs)) == [cim_to_json(doc) for doc in cim_docs]
+    assert list(batch.cim_to_cimple(cim_docs)) == documents
+    assert batch.stats.per_second > 0
+
+def test_batch_memo():
+    # Objects shared between documents keep their identity across the batch
+    color = cim.CIMRGBColor(values=[0, 0, 0, 100])
+    documents = [cim.CIMSolidFill(color=color) for _ in range(3)]
+    batch = Batch(memo=True)
+    fills = list(batch.cimple_to_cim(documents))
+    assert fills[0].color is fills[1].color is fills[2].color
+    assert batch.to_cim_memo is not None and batch.to_cim_memo.saved == 2
+
+def layer_name(doc: Any) -> str:
+    return doc.layerDefinitions[0].name
+
+def test_map_documents(tmp_path: Path):
+    documents = [
+        cim.CIMLayerDocument(layerDefinitions=[cim.CIMFeatureLayer(name=f'Layer {i}')]) 
+        for i in range(10)
+    ]
+    texts = [cimple_to_json(doc) for doc in documents]
+    paths: list[Path] = []
+    for i, text in enumerate(texts):
+        paths.append(tmp_path / f'layer_{i}.lyrx')
+        paths[-1].write_text(text)
+    
+    # Results keep the input order across chunks and workers
+    assert list(map_documents(texts, workers=2, chunksize=3, max_pending=2)) == documents
+    assert list(map_documents(paths, layer_name, workers=2, chunksize=3)) == [f'Layer {i}' for i in range(10)]
+
+def test_streaming():
+    import codecs
+    import io
+    layers = [cim.CIMFeatureLayer(name=f'Layer {i}', uRI=f'CIMPATH=map/layer_{i}.json') for i in range(20)]
+    doc = cim.CIMMapDocument(mapDefinition=cim.CIMMap(name='Map'), layerDefinitions=layers)
+    text = cimple_to_json(doc)
+    
+    # Small chunks split values (including the members before layerDefinitions) across reads
+    for chunk_size in (7, 64, 1 << 16):
+        assert list(iter_cimple(io.StringIO(text), chunk_size=chunk_size)) == layers
+        assert list(iter_cimple(io.BytesIO(text.encode()), chunk_size=chunk_size)) == layers
+    
+    streamed = list(iter_cim(io.StringIO(text), chunk_size=16))
+    assert [layer.name for layer in streamed] == [layer.name for layer in layers]
+    assert all(isinstance(layer, arcpy.cim.CIMFeatureLayer) for layer in streamed)
+    
+    assert list(iter_cimple(io.StringIO(text), key='mapDefinition')) == [doc.mapDefinition]
+    assert list(iter_cimple(io.StringIO(text), key='missing')) == []
+    assert list(iter_cimple(io.StringIO('[1234567, 2.5 ]'), key=None, chunk_size=3)) == [1234567, 2.5]
+    
+    # Numbers split at any point are read whole, including skipped members
+    numbers = {
+        '[1.5, 2.5]': [1.5, 2.5],
+        '[10.25,3e5]': [10.25, 3e5],
+        '[-0.5e-3,7]': [-0.5e-3, 7],
+        '{"scale": 1.25, "n": -3E+2, "layerDefinitions": [{"type": "CIMFeatureLayer", "maxScale": 1.5e3}], "end": 2}': [
+            cim.CIMFeatureLayer(maxScale=1.5e3)
+        ],
+    }
+    for number_text, expected in numbers.items():
+        key = 'layerDefinitions' if number_text.startswith('{') else None
+        for chunk_size in range(1, len(number_text) + 1):
+            assert list(iter_cimple(io.StringIO(number_text), key=key, chunk_size=chunk_size)) == expected, chunk_size
+            # A byte order mark is skipped
+            data = codecs.BOM_UTF8 + number_text.encode()
+            assert list(iter_cimple(io.BytesIO(data), key=key, chunk_size=chunk_size)) == expected, chunk_size
+    try:
+        list(iter_cimple(io.StringIO('{"layerDefinitions": [{"a": }]}')))
+        assert False, 'invalid JSON was decoded'
+    except json.JSONDecodeError:
+        pass
+
+def test_dump():
+    import io
+    import tempfile
+    doc = cim.CIMMapDocument(
+        mapDefinition=cim.CIMMap(name='Mäp'),
+        layerDefinitions=[cim.CIMFeatureLayer(name=f'Layer {i}') for i in range(20)],
+    )
+    # Keys are written like json.dumps writes them, at every depth
+    doc.layerDefinitions[0].customProperties = {1: 'a', None: 2, 1.5: True, False: 3}  # type: ignore
+    text = cimple_to_json(doc)
+    for buffer_size in (1, 100, 1 << 16):
+        fp = io.StringIO()
+        dump_cimple(doc, fp, buffer_size=buffer_size)
+        assert fp.getvalue() == text
+        
+        for depth in (0, 1, 5):
+            fp = io.StringIO()
+            dump_cimple(doc, fp, indent=None, buffer_size=buffer_size, depth=depth)
+            assert fp.getvalue() == cimple_to_json(doc, indent=None)
+        
+        fp = io.BytesIO()
+        dump_cimple(doc, fp, buffer_size=buffer_size)
+        assert fp.getvalue().decode('utf-8') == text
+    
+    # File objects outside the io hierarchy are told apart by their mode or first write
+    class Writer:
+        def __init__(self, binary: bool):
+            self.parts = []
+            self.binary = binary
+        
+        def write(self, data):
+            if isinstance(data, bytes) != self.binary:
+                raise TypeError(f'can\'t write {data.__class__.__name__}')
+            self.parts.append(data)
+    
+    for mode in ('w+b', 'w+'):
+        with tempfile.SpooledTemporaryFile(mode=mode) as spooled:
+            dump_cimple(doc, spooled, buffer_size=100)
+            spooled.seek(0)
+            assert [layer.name for layer in iter_cimple(spooled)] == [f'Layer {i}' for i in range(20)]
+    for binary in (True, False):
+        writer = Writer(binary)
+        dump_cimple(doc, writer, buffer_size=100)
+        assert (b'' if binary else '').join(writer.parts) == (text.encode('utf-8') if binary else text)
+    
+    cim_doc = cimple_to_cim(doc)
+    fp = io.StringIO()
+    dump_cim(cim_doc, fp, buffer_size=100)
+    assert fp.getvalue() == cim_to_json(cim_doc)
+    fp.seek(0)
+    assert [layer.name for layer in iter_cim(fp)] == [f'Layer {i}' for i in range(20)]
+
+def test_compact_profile():
+    import io
+    import math
+    symbol = cim.CIMSymbolReference(
+        symbol=cim.CIMPointSymbol(
+            haloSize=1.23456,
+            angle=12.3456789012,
+            symbolLayers=[
+                cim.CIMSolidFill(color=cim.CIMRGBColor(values=[10.004, 20.5, 30.0, 100.0])),
+                cim.CIMSolidStroke(width=0.70000001),
+            ],
+        ),
+    )
+    doc = cim.CIMMap(name='Map', timeDimension=math.nan)
+    text = cimple_to_json(symbol, profile='compact')
+    assert ' ' not in text and '\n' not in text
+    assert len(text) < len(cimple_to_json(symbol)) / 2
+    
+    decoded = json_to_cimple(text)
+    assert decoded.symbol.haloSize == 1.23 and decoded.symbol.angle == 12.345679
+    assert decoded.symbol.symbolLayers[0].color.values == [10, 20.5, 30, 100]
+    assert decoded.symbol.symbolLayers[1].width == 0.7
+    # nan and inf are written the way the decoder reads them
+    assert '"maxScale":"inf"' in text and decoded.maxScale == math.inf
+    assert json_to_cimple(cimple_to_json(doc, profile='compact')).timeDimension is None
+    # Without any NaN or Infinity constant in the JSON, in every kind of field
+    layer = cim.CIMFeatureLayer(
+        minScale=math.inf, maxScale=-math.inf, customProperties={'range': [math.nan, math.inf, -math.inf]},
+    )
+    compact = cimple_to_json(layer, profile='compact')
+    def no_constants(constant: str):
+        raise ValueError(f'{constant} in compact JSON')
+    parsed = json.loads(compact, parse_constant=no_constants)
+    assert parsed['customProperties'] == {'range': [None, 'inf', '-inf']}
+    for decoded_layer in (json_to_cimple(compact), cimpleJSONDecoder().decode(compact), json_to_cim(compact)):
+        assert decoded_layer.minScale == math.inf and decoded_layer.maxScale == -math.inf
+    # Only floats that are exact ints become ints, large ones keep their short float form
+    large = json.loads(cimple_to_json(cim.CIMFeatureLayer(maxScale=1e300, minScale=-2.0 ** 60), profile='compact'))
+    assert large['maxScale'] == 1e300 and large['maxScale'].__class__ is float
+    assert large['minScale'] == -2.0 ** 60 and large['minScale'].__class__ is float
+    
+    # Every JSON entry point accepts a profile
+    cim_symbol = cimple_to_cim(symbol)
+    assert cim_to_json(cim_symbol, profile='compact') == text
+    fp = io.StringIO()
+    dump_cimple(symbol, fp, profile='compact')
+    assert fp.getvalue() == text
+    fp = io.StringIO()
+    dump_cim(cim_symbol, fp, profile='compact')
+    assert fp.getvalue() == text
+    assert list(Batch(profile='compact').cimple_to_json([symbol])) == [text]
+    assert list(Batch(profile='compact').cim_to_json([cim_symbol])) == [text]
+    
+    # Profiles that only change whitespace leave every value as is
+    assert cimple_to_json(symbol, profile=EncodingProfile(indent=None)) == cimple_to_json(symbol, indent=None)
+    try:
+        cimple_to_json(symbol, profile='tiny')
+        assert False, 'unknown profile was accepted'
+    except ValueError:
+        pass
+
+def test_sparse_profile():
+    import io
+    doc = cim.CIMLayerDocument(
+        layerDefinitions=[
+            cim.CIMFeatureLayer(name='Roads', visibility=False, maxScale=1000.0),
+            cim.CIMGroupLayer(name='Group', layers=['CIMPATH=map/roads.json']),
+        ],
+    )
+    text = cimple_to_json(doc, profile='sparse')
+    assert len(text) < len(cimple_to_json(doc, indent=None)) / 2
+    layer = json.loads(text)['layerDefinitions'][0]
+    # Only the fields that differ from their default (and child objects) are written
+    assert set(layer) == {'type', 'name', 'visibility', 'maxScale', 'featureTable', 'renderer'}
+    
+    assert json_to_cimple(text) == doc
+    assert cimpleJSONDecoder().decode(text) == doc
+    cim_doc = cimple_to_cim(doc)
+    assert cim_to_json(cim_doc, profile='sparse') == text
+    assert cim_to_cimple(json_to_cim(text)) == doc
+    
+    fp = io.StringIO()
+    dump_cimple(doc, fp, profile='sparse')
+    assert fp.getvalue() == text
+    assert list(Batch(profile='sparse').cim_to_json([cim_doc])) == [text]
+    
+    # Values that only equal their default are written
+    point = cim.CIMPointSymbol(symbolLayers=None, angle=0, haloSize=True)  # type: ignore
+    assert set(json.loads(cimple_to_json(point, profile='sparse'))) == {'type', 'symbolLayers', 'angle', 'haloSize'}
+    restored = json_to_cimple(cimple_to_json(point, profile='sparse'))
+    assert restored.symbolLayers is None and restored.angle.__class__ is int and restored.haloSize is True
+
+def test_binary():
+    import math
+    doc = cim.CIMMapDocument(
+        mapDefinition=cim.CIMMap(name='Mäp', mapType='Scene'),
+        layerDefinitions=[
+            cim.CIMFeatureLayer(
+                name='Roads', 
+                layerType='BasemapBackground', 
+                maxScale=-1.5e-300, 
+                customProperties={'key': [1, -2, 3 ** 70, 0.1, None, True]},
+                renderer=cim.CIMSimpleRenderer(
+                    symbol=cim.CIMSymbolReference(
+                        symbol=cim.CIMPointSymbol(
+                            symbolLayers=[
+                                cim.CIMSolidStroke(capStyle='Butt', width=0.1 + 0.2),
+                                cim.CIMSolidFill(color=cim.CIMRGBColor(values=[0.5, 112.25, 255.0, 100.0])),
+                            ]
+                        )
+                    )
+                ),
+            ),
+            cim.CIMGroupLayer(name='Group', layers=['CIMPATH=map/roads.json']),
+        ],
+    )
+    data = cimple_to_bytes(doc)
+    assert len(data) < len(cimple_to_json(doc, profile='sparse'))
+    assert bytes_to_cimple(data) == json_to_cimple(cimple_to_json(doc))
+    assert bytes_to_cimple(memoryview(data)) == bytes_to_cimple(bytearray(data))
+    assert bytes_to_cimple(cimple_to_bytes([doc.mapDefinition, 'text', 1.5])) == [doc.mapDefinition, 'text', 1.5]
+    assert math.isnan(bytes_to_cimple(cimple_to_bytes([math.nan]))[0])
+
+    # Keys and tuples are written like the JSON of the same document
+    odd = cim.CIMFeatureLayer(
+        name='Odd', 
+        customProperties={True: (1, 2.5), None: (0.5, 1.5), 3: 'three', 2.5: [('a', False)]},
+    )
+    assert bytes_to_cimple(cimple_to_bytes(odd)) == json_to_cimple(cimple_to_json(odd))
+    assert list(bytes_to_cimple(cimple_to_bytes(odd)).customProperties) == ['true', 'null', '3', '2.5']
+    
+    for corrupt in (b'JSON' + data[4:], data[:5] + bytes(8) + data[13:]):
+        try:
+            bytes_to_cimple(corrupt)
+            assert False, 'corrupt buffer was decoded'
+        except ValueError:
+            pass
+
+def test_binary_views(tmp_path: Path):
+    import mmap
+    layer = cim.CIMFeatureLayer(
+        name='Roads',
+        layerType='BasemapBackground',
+        customProperties={'owner': 'gis', 'tags': ['a', 'b']},
+        renderer=cim.CIMSimpleRenderer(
+            symbol=cim.CIMSymbolReference(
+                symbol=cim.CIMPointSymbol(
+                    symbolLayers=[
+                        cim.CIMSolidStroke(capStyle='Butt', width=2.5),
+                        cim.CIMSolidFill(color=cim.CIMRGBColor(values=[0.5, 112.25, 255.0, 100.0])),
+                    ]
+                )
+            )
+        ),
+    )
+    path = tmp_path / 'layer.cimb'
+    path.write_bytes(cimple_to_bytes(layer))
+    with path.open('rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        view = open_view(m)
+        assert view.type == 'CIMFeatureLayer'
+        assert view.name == 'Roads' and view.layerType == 'BasemapBackground'
+        # Fields at their default aren't stored and return the default
+        assert view.visibility is True and view.labelClasses == [] and view.extent is None
+        assert view.customProperties['owner'] == 'gis' and list(view.customProperties['tags']) == ['a', 'b']
+        
+        symbol_layers = view.renderer.symbol.symbol.symbolLayers
+        assert len(symbol_layers) == 2
+        assert symbol_layers[0].capStyle == 'Butt' and symbol_layers[0].width == 2.5
+        assert list(symbol_layers[1].color.values) == [0.5, 112.25, 255.0, 100.0]
+        assert view.renderer.to_cimple() == layer.renderer
+        try:
+            view.missing
+            assert False, 'unknown field was read'
+        except AttributeError:
+            pass
+        # Views (and the memoryviews they return) hold the map open
+        del view, symbol_layers
+    
+    # Lists read through their parent are scanned once, not on every access
+    from cimple import binary
+    paths = [f'CIMPATH=map/layer{i}.json' for i in range(500)]
+    group = open_view(cimple_to_bytes(cim.CIMGroupLayer(name='Group', layers=paths)))
+    skip = binary._skip
+    skipped = []
+    binary._skip = lambda view, pos: skipped.append(pos) or skip(view, pos)
+    try:
+        assert [group.layers[i] for i in range(len(group.layers))] == paths
+        assert list(group.layers) == paths and group.layers is group.layers
+    finally:
+        binary._skip = skip
+    assert len(skipped) == len(paths)
+
+def test_pickle():
+    import copy
+    import pickle
+    doc = cim.CIMMapDocument(
+        mapDefinition=cim.CIMMap(name='Map', layers=['CIMPATH=map/roads.json']),
+        layerDefinitions=[
+            cim.CIMFeatureLayer(
+                name='Roads',
+                renderer=cim.CIMSimpleRenderer(
+                    symbol=cim.CIMSymbolReference(
+                        symbol=cim.CIMPointSymbol(symbolLayers=[cim.CIMSolidStroke(capStyle='Butt')]),
+                    ),
+                ),
+            ),
+        ],
+    )
+    data = pickle.dumps(doc)
+    assert pickle.loads(data) == doc
+    # Field names aren't pickled, only the class names
+    assert b'symbolLayers' not in data and b'CIMSolidStroke' in data
+    
+    color = cim.CIMRGBColor()
+    restored = pickle.loads(pickle.dumps([color, color]))
+    assert restored[0] == color and restored[0] is restored[1]
+    assert restored[0].values is not color.values
+    assert copy.deepcopy(doc) == doc
+    
+    # Attributes set outside the fields survive
+    color.note = 'extra'  # type: ignore
+    assert pickle.loads(pickle.dumps(color)).note == 'extra'
+    
+    # Objects with a deleted field are pickled by their __dict__
+    del color.values
+    restored = pickle.loads(pickle.dumps(color))
+    assert restored.__class__ is cim.CIMRGBColor and restored.__dict__ == color.__dict__
+    
+    # Values equal to a default of another type keep their type
+    point = pickle.loads(pickle.dumps(cim.CIMPointSymbol(angle=0, haloSize=True)))
+    assert point.angle.__class__ is int and point.haloSize is True
+
+def test_json_backends():
+    import importlib.util
+    import math
+    doc = cim.CIMMapDocument(
+        mapDefinition=cim.CIMMap(name='Mäp', referenceScale=1e-7, timeDimension=math.inf),
+        layerDefinitions=[cim.CIMFeatureLayer(name=f'Layer {i}', maxScale=1.5e300 * i) for i in range(3)],
+    )
+    texts = [
+        cimple_to_json(doc),
+        cimple_to_json(doc, profile='sparse').encode(),
+        '{"values": [123456789012345678901234567890, 18446744073709551615, NaN, 1e400]}',
+        '{"values": [-9223372036854775809, -9223372036854775808]}',
+    ]
+    current = get_backend().name
+    expected = [json_to_cimple(text) for text in texts]
+    try:
+        for name in ('orjson', 'msgspec', 'stdlib'):
+            if name != 'stdlib' and importlib.util.find_spec(name) is None:
+                continue
+            assert set_backend(name).name == name
+            results = [json_to_cimple(text) for text in texts]
+            assert results[:2] == expected[:2]
+            # Values the fast backends can't read are parsed by the stdlib
+            wide, u64, nan, inf = results[2]['values']
+            assert wide == 123456789012345678901234567890 and wide.__class__ is int
+            assert results[3] == expected[3] and all(v.__class__ is int for v in results[3]['values'])
+            assert u64 == 18446744073709551615 and math.isnan(nan) and inf == math.inf
+            assert list(Batch().json_to_cimple(texts[:2])) == expected[:2]
+        # The fast backends are only faster for some documents, so they aren't picked by default
+        assert set_backend().name == 'stdlib'
+        try:
+            set_backend('ujson')
+            assert False, 'unknown backend was set'
+        except ValueError:
+            pass
+    finally:
+        set_backend(current)
+
+def test_type_first():
+    import io
+    doc = cim.CIMLayerDocument(
+        layerDefinitions=[
+            cim.CIMFeatureLayer(name='Roads', renderer=cim.CIMSimpleRenderer(symbol=cim.CIMSymbolReference())),
+        ],
+    )
+    # Every encoder writes the type discriminator as the first key
+    def first_keys(pairs: list[tuple[str, object]]) -> dict[str, object]:
+        assert pairs[0][0] == 'type'
+        return dict(pairs)
+    cim_doc = cimple_to_cim(doc)
+    for text in (
+        cimple_to_json(doc), 
+        cimple_to_json(doc, profile='sparse'), 
+        json.dumps(doc, cls=cimpleJSONEncoder), 
+        cim_to_json(cim_doc),
+    ):
+        json.loads(text, object_pairs_hook=first_keys)
+    
+    # Decoders read documents with the type anywhere in an object
+    last = json.dumps(json.loads(cimple_to_json(doc), object_pairs_hook=lambda p: dict(p[1:] + p[:1])))
+    assert last.endswith('"type": "CIMLayerDocument"}')
+    for text in (cimple_to_json(doc), last):
+        assert cimpleJSONDecoder().decode(text) == doc
+        assert cim_to_cimple(json_to_cim(text)) == doc
+        assert list(iter_cimple(io.StringIO(text))) == doc.layerDefinitions
+    
+    # Incomplete objects are filled in with new defaults
+    layer = cimpleJSONDecoder().decode('{"type": "CIMFeatureLayer", "name": "Parcels"}')
+    assert layer == cim.CIMFeatureLayer(name='Parcels')
+    assert layer.labelClasses is not cimpleJSONDecoder().decode('{"type": "CIMFeatureLayer"}').labelClasses
+
+def test_geometry_modes():
+    layer_json = json.dumps({
+        'type': 'CIMFeatureLayer',
+        'name': 'Parcels',
+        'extent': {'xmin': 0.123456789, 'ymin': 0, 'xmax': 1, 'ymax': 1, 'spatialReference': {'wkid': 4326}},
+    })
+    map_json = json.dumps({'type': 'CIMMap', 'spatialReference': {'wkid': 3857, 'latestWkid': 3857}})
+    current = get_geometry_mode()
+    try:
+        for mode in ('arcpy', 'json'):
+            set_geometry_mode(mode)
+            layer = json_to_cimple(layer_json)
+            cim_map = json_to_cimple(map_json)
+            if mode == 'json':
+                assert layer.extent == JSONGeometry(json.loads(layer_json)['extent'])
+                assert layer.extent.spatialReference.factoryCode == 4326
+                assert cim_map.spatialReference == JSONSpatialReference({'wkid': 3857, 'latestWkid': 3857})
+                # cim conversion builds arcpy objects
+                assert isinstance(cimple_to_cim(layer).extent, arcpy.Extent)
+                assert cimple_to_cim(cim_map).spatialReference == arcpy.SpatialReference(3857)
+                assert isinstance(json_to_cim(layer_json).extent, arcpy.Extent)
+                assert json_to_cim(map_json).spatialReference == arcpy.SpatialReference(3857)
+                assert isinstance(list(Batch().json_to_cim([layer_json]))[0].extent, arcpy.Extent)
+            else:
+                assert isinstance(layer.extent, arcpy.Extent)
+            # Both kinds of values are written back as esri JSON
+            for text in (cimple_to_json(layer), json.dumps(layer, cls=cimpleJSONEncoder), cim_to_json(cimple_to_cim(layer))):
+                assert json.loads(text)['extent'] == json.loads(layer_json)['extent']
+            assert json_to_cimple(cimple_to_json(layer)) == layer
+            assert bytes_to_cimple(cimple_to_bytes(layer)) == layer
+            assert json.loads(cimple_to_json(layer, profile='compact'))['extent']['xmin'] == 0.123457
+            # Profiles don't change the decoded values
+            assert layer.extent == json_to_cimple(layer_json).extent
+        try:
+            set_geometry_mode('shapely')
+            assert False, 'unknown mode was set'
+        except ValueError:
+            pass
+    finally:
+        set_geometry_mode(current)
+
+def test_without_arcpy():
+    import os
+    import subprocess
+    import cimple
+    # cimple JSON round trips with arcpy blocked from importing
+    code = (
+        'import sys\n'
+        'sys.modules["arcpy"] = None\n'
+        'from cimple import cim, json_to_cimple, cimple_to_json, JSONGeometry, get_geometry_mode\n'
+        'assert get_geometry_mode() == "json"\n'
+        'text = sys.argv[1]\n'
+        'layer = json_to_cimple(text)\n'
+        'assert isinstance(layer.extent, JSONGeometry) and isinstance(layer, cim.CIMFeatureLayer)\n'
+        'assert json_to_cimple(cimple_to_json(layer)) == layer\n'
+        'print(cimple_to_json(layer, indent=None))\n'
+    )
+    layer = cim.CIMFeatureLayer(name='Parcels', extent=arcpy.AsShape({'xmin': 0, 'ymin': 0, 'xmax': 1, 'ymax': 1}, esri_json=True))
+    text = cimple_to_json(layer, indent=None)
+    path = os.pathsep.join(str(Path(m.__file__).parents[1]) for m in (cimple, arcpy))  # type: ignore
+    result = subprocess.run(
+        [sys.executable, '-c', code, text],
+        env={**os.environ, 'PYTHONPATH': path}, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == text
+
 if __name__ == '__main__':
+    import tempfile
     test_cim_roundtrip()
     test_cimple_json_roundtrip()
-    test_cim_json_roundtrip()
\ No newline at end of file
+    test_cim_json_roundtrip()
+    test_json_to_cim_direct()
+    test_json_to_cim_skips_cimple()
+    test_cim_to_json_direct()
+    test_typed_decoding()
+    test_codecs_match_generic()
+    test_codecs_fill_defaults()
+    test_codecs_keep_unknown_fields()
+    test_converters()
+    test_deep_nesting()
+    test_conversion_memo()
+    test_conversion_memo_cycles()
+    test_batch()
+    test_batch_memo()
+    test_streaming()
+    test_dump()
+    test_compact_profile()
+    test_sparse_profile()
+    test_binary()
+    test_pickle()
+    test_json_backends()
+    test_type_first()
+    test_geometry_modes()
+    test_without_arcpy()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_binary_views(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_map_documents(Path(tmp))
\ No newline at end of file